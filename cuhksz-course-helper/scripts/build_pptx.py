@@ -3,15 +3,31 @@ CUHKsz Course Helper - PPTX Builder Script
 Builds a standardized PPTX from structured slide content JSON.
 
 Usage:
-    python build_pptx.py <content.json> <output.pptx> [--template cs|math|stats]
+    python build_pptx.py <content.json|content.jsonl> <output.pptx> [--template cs|math|stats]
+
+Use "-" as the content file to read JSON / JSONL from stdin.
+
+Body text and definition/theorem boxes are measured before the deck is
+built (text_fit.py): text that overflows its frame is shrunk down to
+MIN_BODY_PT / MIN_BOX_PT, and what still does not fit continues on
+"(cont.)" slides.
+
+The .pptx is byte-reproducible: zip entries are written in a fixed order
+with a fixed timestamp, and the document dates are set to SOURCE_DATE_EPOCH
+(or repro.REPRODUCIBLE_EPOCH), so the same content gives the same file.
 
 Dependencies:
     pip install python-pptx
 """
 
-import json
+import io
 import sys
-from pathlib import Path
+import zipfile
+from datetime import datetime, timezone
+
+from repro import REPRODUCIBLE_EPOCH, source_date_epoch
+from slide_io import load_deck, validate_slides
+from text_fit import fit_text, get_metrics
 
 try:
     from pptx import Presentation
@@ -86,6 +102,20 @@ MARGIN_L = Inches(0.75)
 MARGIN_R = Inches(0.75)
 MARGIN_TOP = Inches(1.2)
 
+# Text sizes (points); text is shrunk down to the MIN_ sizes before it is split
+BODY_PT = 14
+MIN_BODY_PT = 11
+BODY_SPACE_AFTER_PT = 4
+BOX_PT = 13
+MIN_BOX_PT = 10
+# Definition/theorem boxes grow from BOX_H up to the footer
+BOX_H = Inches(2.5)
+BOX_MAX_H = SLIDE_H - MARGIN_TOP - FOOTER_H - Inches(0.1)
+TEXT_W = SLIDE_W - MARGIN_L - MARGIN_R
+# Default python-pptx text frame insets: 0.1" left/right, 0.05" top/bottom
+TEXT_INSET_W = Inches(0.2)
+TEXT_INSET_H = Inches(0.1)
+
 
 def set_background(slide, color: RGBColor):
     """Set solid background color for a slide."""
@@ -173,12 +203,12 @@ def add_slide_title(slide, cfg: dict, title_text: str, is_ai: bool = False):
 
 
 def add_body_text(slide, cfg: dict, lines: list, is_ai: bool = False,
-                  top: float = None):
+                  top: float = None, size: float = BODY_PT):
     """Add body text block."""
     top_pos = top if top is not None else MARGIN_TOP
     tf = slide.shapes.add_textbox(
         MARGIN_L, top_pos,
-        SLIDE_W - MARGIN_L - MARGIN_R,
+        TEXT_W,
         SLIDE_H - top_pos - FOOTER_H - Inches(0.1)
     )
     tf.text_frame.word_wrap = True
@@ -189,16 +219,17 @@ def add_body_text(slide, cfg: dict, lines: list, is_ai: bool = False,
             p = tf.text_frame.add_paragraph()
         run = p.add_run()
         run.text = line
-        run.font.size = Pt(14)
+        run.font.size = Pt(size)
         run.font.name = cfg["body_font"]
         run.font.color.rgb = cfg["ai_accent"] if is_ai else cfg["body_color"]
         if is_ai:
             run.font.italic = True
-        p.space_after = Pt(4)
+        p.space_after = Pt(BODY_SPACE_AFTER_PT)
 
 
 def add_box(slide, cfg: dict, label: str, content_lines: list,
-            box_type: str = "definition", is_ai: bool = False):
+            box_type: str = "definition", is_ai: bool = False,
+            size: float = BOX_PT, height: int = BOX_H):
     """Add a definition or theorem box."""
     if box_type == "definition":
         bg_color = cfg["def_box_bg"]
@@ -212,8 +243,8 @@ def add_box(slide, cfg: dict, label: str, content_lines: list,
     box = slide.shapes.add_shape(
         1,
         MARGIN_L, MARGIN_TOP,
-        SLIDE_W - MARGIN_L - MARGIN_R,
-        Inches(2.5)
+        TEXT_W,
+        height
     )
     box.fill.solid()
     box.fill.fore_color.rgb = bg_color
@@ -226,7 +257,7 @@ def add_box(slide, cfg: dict, label: str, content_lines: list,
     run = p.add_run()
     run.text = label
     run.font.bold = True
-    run.font.size = Pt(13)
+    run.font.size = Pt(size)
     run.font.name = cfg["body_font"]
     run.font.color.rgb = cfg["ai_accent"] if is_ai else text_color
 
@@ -234,7 +265,7 @@ def add_box(slide, cfg: dict, label: str, content_lines: list,
         p = tf.add_paragraph()
         run = p.add_run()
         run.text = line
-        run.font.size = Pt(13)
+        run.font.size = Pt(size)
         run.font.name = cfg["body_font"]
         run.font.color.rgb = cfg["ai_accent"] if is_ai else text_color
         if is_ai:
@@ -257,28 +288,118 @@ def add_helper_tag(slide, cfg: dict):
     run.font.color.rgb = cfg["ai_accent"]
 
 
-def build_pptx(content_json: str, output_path: str, template_name: str = "math",
+def layout_deck(slides_data: list[dict], cfg: dict) -> list[dict]:
+    """
+    Measure body text and boxes and expand the deck into the slides that will
+    actually be built. Each record gets "font_size", "box_height" (boxes),
+    "source_index" and "fit_note" ("" when the text fits as is); overflow
+    becomes extra records titled "<title> (cont.)".
+    """
+    width = Emu(TEXT_W - TEXT_INSET_W).pt
+    pages = []
+    for i, slide_data in enumerate(slides_data):
+        slide_type = slide_data["type"]
+        metrics = get_metrics(cfg["body_font"], italic=slide_data["is_ai_generated"])
+        if slide_type in ("title", "section_divider"):
+            pages.append({**slide_data, "font_size": None, "box_height": None,
+                          "source_index": i, "fit_note": ""})
+            continue
+
+        is_box = slide_type in ("definition", "theorem", "lemma")
+        frame_h = Emu(BOX_MAX_H - TEXT_INSET_H).pt
+        if is_box:
+            # add_box draws the label bold (and never italic)
+            fits = fit_text(slide_data["body_text"], metrics, width,
+                            frame_h, BOX_PT, MIN_BOX_PT,
+                            header=slide_type.capitalize() + ":",
+                            header_metrics=get_metrics(cfg["body_font"], bold=True))
+        else:
+            fits = fit_text(slide_data["body_text"], metrics, width,
+                            frame_h, BODY_PT, MIN_BODY_PT,
+                            space_after=BODY_SPACE_AFTER_PT)
+
+        base_size = BOX_PT if is_box else BODY_PT
+        if len(fits) > 1:
+            note = f"split into {len(fits)} slides"
+        elif fits[0].size < base_size:
+            note = f"shrunk to {fits[0].size:g} pt"
+        else:
+            note = ""
+        if any(fit.height > frame_h for fit in fits):
+            note = (note + "; " if note else "") + "still overflows the text frame"
+        for j, fit in enumerate(fits):
+            pages.append({
+                **slide_data,
+                "title": slide_data["title"] if j == 0 else f"{slide_data['title']} (cont.)",
+                "body_text": fit.paragraphs,
+                "font_size": fit.size,
+                "box_height": min(max(Pt(fit.height) + TEXT_INSET_H, BOX_H), BOX_MAX_H) if is_box else None,
+                "source_index": i,
+                "fit_note": note if j == 0 else "",
+            })
+    return pages
+
+
+def save_reproducible(prs, output_path: str):
+    """
+    Save prs with deterministic bytes: [Content_Types].xml first and the
+    other parts sorted by name, every entry stamped with SOURCE_DATE_EPOCH.
+    """
+    stamp = datetime.fromtimestamp(source_date_epoch(), timezone.utc)
+    props = prs.core_properties
+    props.created = props.modified = stamp.replace(tzinfo=None)
+    props.revision = 1
+
+    # Zip timestamps cannot go below 1980
+    zip_time = datetime.fromtimestamp(
+        max(source_date_epoch(), REPRODUCIBLE_EPOCH), timezone.utc).timetuple()[:6]
+
+    buf = io.BytesIO()
+    prs.save(buf)
+    with zipfile.ZipFile(buf) as src:
+        names = sorted(src.namelist(), key=lambda n: (n != "[Content_Types].xml", n))
+        out = io.BytesIO()
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+            for name in names:
+                info = zipfile.ZipInfo(name, date_time=zip_time)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.create_system = 0
+                info.external_attr = 0o644 << 16
+                dst.writestr(info, src.read(name))
+    with open(output_path, "wb") as f:
+        f.write(out.getvalue())
+
+
+def build_pptx(content_json, output_path: str, template_name: str = "math",
                course_code: str = "", total_slides: int = 0):
     """
     Build a PPTX from structured content JSON.
 
-    content_json: path to JSON file or JSON string
+    content_json: deck dict, iterable of slide records, path to .json/.jsonl,
+                  JSON/JSONL text, or an open file object (see slide_io.load_deck)
     output_path: output .pptx path
     template_name: "math", "cs", or "stats"
     course_code: e.g. "MAT3007 | Lecture 1"
+    total_slides: footer total; counts source slides, so the "(cont.)"
+                  slides added by the layout are added to it (default: the
+                  number of slides built)
     """
     cfg = TEMPLATES.get(template_name.lower(), TEMPLATES["stats"])
 
-    # Load content
-    if Path(content_json).exists():
-        with open(content_json, encoding="utf-8") as f:
-            data = json.load(f)
-    else:
-        data = json.loads(content_json)
-
-    slides_data = data.get("slides", [])
-    if not total_slides:
-        total_slides = len(slides_data)
+    # Load content and check its schema once for the whole deck
+    try:
+        slides_data = validate_slides(load_deck(content_json))
+    except (OSError, ValueError) as e:
+        print(f"ERROR: invalid slide content: {e}")
+        return None
+
+    # Shrink or split overfull text before any slide is created
+    pages = layout_deck(slides_data, cfg)
+    notes = [p for p in pages if p["fit_note"]]
+    for page in notes:
+        print(f"  Slide {page['source_index'] + 1}: {page['fit_note']}")
+    # Overflow slides shift every later number, so the total grows with them
+    total_slides = (total_slides or len(slides_data)) + len(pages) - len(slides_data)
 
     prs = Presentation()
     prs.slide_width = SLIDE_W
@@ -286,14 +407,14 @@ def build_pptx(content_json: str, output_path: str, template_name: str = "math",
 
     blank_layout = prs.slide_layouts[6]  # Blank layout
 
-    for i, slide_data in enumerate(slides_data):
+    for i, slide_data in enumerate(pages):
         slide = prs.slides.add_slide(blank_layout)
         set_background(slide, cfg["bg"])
 
-        slide_type = slide_data.get("type", "content")
-        title = slide_data.get("title", "")
-        body = slide_data.get("body_text", [])
-        is_ai = slide_data.get("is_ai_generated", False)
+        slide_type = slide_data["type"]
+        title = slide_data["title"]
+        body = slide_data["body_text"]
+        is_ai = slide_data["is_ai_generated"]
         slide_num_str = f"{i + 1} / {total_slides}"
 
         if slide_type == "title":
@@ -345,7 +466,8 @@ def build_pptx(content_json: str, output_path: str, template_name: str = "math",
         elif slide_type in ("definition", "theorem", "lemma"):
             add_slide_title(slide, cfg, title, is_ai)
             label = slide_type.capitalize() + ":"
-            add_box(slide, cfg, label, body, box_type=slide_type, is_ai=is_ai)
+            add_box(slide, cfg, label, body, box_type=slide_type, is_ai=is_ai,
+                    size=slide_data["font_size"], height=slide_data["box_height"])
             add_footer(slide, cfg, course_code, slide_num_str)
             if is_ai:
                 add_helper_tag(slide, cfg)
@@ -353,13 +475,13 @@ def build_pptx(content_json: str, output_path: str, template_name: str = "math",
         else:
             # Generic content slide
             add_slide_title(slide, cfg, title, is_ai)
-            add_body_text(slide, cfg, body, is_ai)
+            add_body_text(slide, cfg, body, is_ai, size=slide_data["font_size"])
             add_footer(slide, cfg, course_code, slide_num_str)
             if is_ai:
                 add_helper_tag(slide, cfg)
 
-    prs.save(output_path)
-    print(f"Saved: {output_path} ({len(slides_data)} slides, template={template_name})")
+    save_reproducible(prs, output_path)
+    print(f"Saved: {output_path} ({len(pages)} slides, template={template_name})")
     return output_path
 
 
@@ -368,7 +490,7 @@ if __name__ == "__main__":
         print("Usage: python build_pptx.py <content.json> <output.pptx> [--template math|cs|stats]")
         sys.exit(1)
 
-    content_file = sys.argv[1]
+    content_file = sys.stdin.buffer if sys.argv[1] == "-" else sys.argv[1]
     output_file = sys.argv[2]
     template = "math"
     for i, arg in enumerate(sys.argv):
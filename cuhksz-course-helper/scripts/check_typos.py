@@ -0,0 +1,422 @@
+"""
+CUHKsz Course Helper - Suspected Typo Detector
+Lists suspected typos in the JSON produced by extract_content.py (L1 step 4).
+
+Uses a SymSpell-style precomputed deletion index: every dictionary word is
+expanded once into all of its deletions (up to MAX_EDIT_DISTANCE) and stored
+in a lookup table, so checking a word only needs its own deletions instead of
+comparing against the whole dictionary.
+
+Dictionary sources, in rank order (equally close suggestions are ranked by it):
+  - data/frequency_en.txt.gz  SymSpell English frequency list (~83k words,
+                              most frequent first; MIT, see frequency_en_LICENSE.txt)
+  - data/vocab_en.txt         English and university words missing from that list
+  - data/vocab_academic.txt   bundled math / stats / CS terms
+  - course vocabulary         learned from earlier decks of the same course
+
+LaTeX ($...$, \\command), code-like tokens (snake_case, camelCase, f(x), a==b),
+URLs, acronyms and non-English text are skipped.
+
+The built index is pickled to ~/.cache/cuhksz-course-helper/ and rebuilt only
+when a vocabulary file changes. The deletions are stored as one sorted array
+of (crc32 of the deletion, word id) pairs rather than a dict of ~1M strings,
+so start-up is a single pickle load of ~16 MB of raw array data (~30 ms).
+
+Usage:
+    python check_typos.py <content.json> [--course CODE] [--learn earlier.json ...]
+                          [--json report.json] [--all]
+
+    --course CODE   use (and extend) the vocabulary learned for this course
+    --learn FILE    learn course vocabulary from earlier decks' JSON first
+    --json FILE     also write the slide-indexed report as JSON
+    --all           also report unknown words that have no close suggestion
+"""
+
+import gzip
+import json
+import os
+import pickle
+import re
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+
+
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+MAX_SUGGESTIONS = 3
+MIN_WORD_LENGTH = 3
+# A word must appear this many times in earlier decks before it is learned;
+# genuine typos rarely repeat, course terminology does.
+LEARN_MIN_COUNT = 2
+INDEX_FORMAT = 2
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+BUNDLED_VOCAB = [
+    DATA_DIR / "frequency_en.txt.gz",
+    DATA_DIR / "vocab_en.txt",
+    DATA_DIR / "vocab_academic.txt",
+]
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "cuhksz-course-helper"
+COURSE_VOCAB_DIR = CACHE_DIR / "courses"
+
+# Plural endings tried when a word is not in the dictionary, for the base-form
+# academic and course terms; the frequency list already has inflected English
+# forms, and wider stemming ("occured" -> "occur") only hides typos
+PLURAL_SUFFIXES = ("es", "s")
+
+# ── Tokenization ──────────────────────────────────────────────────────────────
+_LATEX_MATH = re.compile(r"\$\$.*?\$\$|\$.*?\$|\\\(.*?\\\)|\\\[.*?\\\]", re.S)
+_LATEX_COMMAND = re.compile(r"\\[A-Za-z]+\*?")
+_INLINE_CODE = re.compile(r"`[^`]*`")
+_URL = re.compile(r"(?:https?://|www\.)\S+|\S+@\S+\.\w+")
+_CODE_CHARS = re.compile(r"[_=<>{}\[\]|#@^~\\/*+]|\w\(|\.\w|::|->")
+_CAMEL_CASE = re.compile(r"[a-z][A-Z]")
+_WORD = re.compile(r"[A-Za-z]+(?:['\u2019][A-Za-z]+)?")
+
+
+def iter_words(text: str):
+    """Yield the checkable English words of a text line, skipping LaTeX and code."""
+    text = _LATEX_MATH.sub(" ", text)
+    text = _INLINE_CODE.sub(" ", text)
+    text = _URL.sub(" ", text)
+    text = _LATEX_COMMAND.sub(" ", text)
+    for raw in text.split():
+        if _CODE_CHARS.search(raw) or _CAMEL_CASE.search(raw):
+            continue
+        if any(ch.isdigit() for ch in raw):
+            continue
+        for match in _WORD.finditer(raw):
+            word = match.group().replace("\u2019", "'")
+            if len(word) < MIN_WORD_LENGTH or word.isupper():
+                continue
+            yield word
+
+
+def _read_vocab(path: Path) -> list[str]:
+    """Read a vocabulary file in order; numeric tokens (course counts) are dropped."""
+    if path.suffix == ".gz":
+        text = gzip.decompress(path.read_bytes()).decode("utf-8")
+    else:
+        text = path.read_text(encoding="utf-8")
+    words = []
+    for line in text.splitlines():
+        if line.lstrip().startswith("#"):
+            continue
+        words.extend(w.lower() for w in line.split() if not w.isdigit())
+    return words
+
+
+# ── SymSpell index ────────────────────────────────────────────────────────────
+def _deletes(word: str, max_distance: int) -> set[str]:
+    """All strings reachable from word by deleting up to max_distance characters."""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        nxt = set()
+        for w in frontier:
+            if len(w) <= 1:
+                continue
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i + 1:])
+        nxt -= result
+        result |= nxt
+        frontier = nxt
+    return result
+
+
+def _edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal-string-alignment distance; returns max_distance + 1 once exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = cur[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _delete_key(d: str) -> int:
+    return zlib.crc32(d.encode("utf-8"))
+
+
+class TypoIndex:
+    """
+    Precomputed deletion index over a word list. `deletes` holds
+    crc32(deletion) << 32 | word id for every deletion of every word, sorted;
+    a crc collision only adds a candidate that the edit distance check drops.
+    """
+
+    def __init__(self, words: list[str], deletes: array):
+        self.words = words
+        self.vocab = set(words)
+        self.deletes = deletes
+
+    @classmethod
+    def build(cls, words: list[str]) -> "TypoIndex":
+        """
+        Build from words in preference order (earlier = more common); the
+        position doubles as the tie-break rank between equally close suggestions.
+        """
+        words = list(dict.fromkeys(words))
+        entries = [_delete_key(d) << 32 | idx
+                   for idx, word in enumerate(words)
+                   for d in _deletes(word[:PREFIX_LENGTH], MAX_EDIT_DISTANCE)]
+        entries.sort()
+        return cls(words, array("Q", entries))
+
+    def candidates(self, deletion: str):
+        """Ids of the words that have `deletion` among their deletions."""
+        key = _delete_key(deletion) << 32
+        deletes = self.deletes
+        i = bisect_left(deletes, key)
+        end = key + (1 << 32)
+        while i < len(deletes) and deletes[i] < end:
+            yield deletes[i] & 0xFFFFFFFF
+            i += 1
+
+    def is_known(self, word: str) -> bool:
+        """
+        In the dictionary, possibly with a possessive 's, or a plural of a
+        dictionary word. A plural is not accepted when the word is also one
+        edit from another dictionary word ("datas" -> "dates", "matrixes"
+        -> "matrices"): that is more likely a typo than a rare plural.
+        """
+        w = word.lower()
+        if w.endswith(("'s", "s'")):
+            w = w[:-2] if w.endswith("'s") else w[:-1]
+        if w in self.vocab:
+            return True
+        for suffix in PLURAL_SUFFIXES:
+            stem = w[: len(w) - len(suffix)]
+            if w.endswith(suffix) and len(stem) >= 2 and stem in self.vocab:
+                return all(near == stem for _, near in self._ranked(w, 1))
+        return False
+
+    def _ranked(self, w: str, max_distance: int) -> list[tuple[int, str]]:
+        """(distance, word) for dictionary words within max_distance, closest and most common first."""
+        seen: dict[int, int] = {}
+        for d in _deletes(w[:PREFIX_LENGTH], MAX_EDIT_DISTANCE):
+            for idx in self.candidates(d):
+                if idx not in seen:
+                    seen[idx] = _edit_distance(w, self.words[idx], max_distance)
+        return [(dist, self.words[idx])
+                for dist, idx in sorted((dist, idx) for idx, dist in seen.items() if dist <= max_distance)]
+
+    def suggest(self, word: str) -> list[str]:
+        """Return up to MAX_SUGGESTIONS dictionary words closest to word."""
+        return [w for _, w in self._ranked(word.lower(), MAX_EDIT_DISTANCE)[:MAX_SUGGESTIONS]]
+
+
+def _vocab_fingerprint(paths: list[Path]) -> tuple:
+    return tuple(
+        (str(p), p.stat().st_mtime_ns, p.stat().st_size) for p in paths if p.exists()
+    ) + ((INDEX_FORMAT, MAX_EDIT_DISTANCE, PREFIX_LENGTH),)
+
+
+def load_index(course: str | None = None) -> TypoIndex:
+    """Load the cached index for course (or the bundled vocabulary), rebuilding if stale."""
+    paths = list(BUNDLED_VOCAB)
+    if course:
+        paths.append(course_vocab_path(course))
+    fingerprint = _vocab_fingerprint(paths)
+    cache_file = CACHE_DIR / f"typo_index_{course or 'base'}.pickle"
+
+    if cache_file.exists():
+        try:
+            with open(cache_file, "rb") as f:
+                cached_fp, words, deletes = pickle.load(f)
+            if cached_fp == fingerprint:
+                return TypoIndex(words, deletes)
+        except Exception:
+            pass  # corrupt or incompatible cache — rebuild below
+
+    words = []
+    for p in paths:
+        if p.exists():
+            words.extend(_read_vocab(p))
+    index = TypoIndex.build(words)
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump((fingerprint, index.words, index.deletes), f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(cache_file)
+    except OSError as e:
+        print(f"  Warning: could not write typo index cache: {e}")
+    return index
+
+
+# ── Course vocabulary ─────────────────────────────────────────────────────────
+def course_vocab_path(course: str) -> Path:
+    return COURSE_VOCAB_DIR / f"{course.upper()}.txt"
+
+
+def _read_course_counts(path: Path) -> dict[str, int]:
+    """Course vocab lines are 'word count', most frequent first."""
+    counts = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        parts = line.split()
+        if parts and not parts[0].startswith("#"):
+            counts[parts[0]] = int(parts[1]) if len(parts) > 1 else 1
+    return counts
+
+
+def _slide_texts(slide: dict):
+    """Yield (field, text) pairs for the checkable text of one slide record."""
+    if slide.get("title"):
+        yield "title", slide["title"]
+    for line in slide.get("body_text", []):
+        yield "body_text", line
+    if slide.get("notes"):
+        yield "notes", slide["notes"]
+
+
+def learn_course_vocab(course: str | None, deck_jsons: list[str], index: TypoIndex) -> list[str]:
+    """
+    Collect words from earlier decks that are unknown to index but recur at
+    least LEARN_MIN_COUNT times. When course is given they are merged into the
+    course vocabulary file; the learned words are returned either way.
+    """
+    counter: Counter = Counter()
+    for path in deck_jsons:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for slide in data.get("slides", []):
+            for _, text in _slide_texts(slide):
+                for word in iter_words(text):
+                    w = word.lower()
+                    if not index.is_known(w):
+                        counter[w] += 1
+
+    learned = {w: c for w, c in counter.items() if c >= LEARN_MIN_COUNT}
+    if course and learned:
+        path = course_vocab_path(course)
+        existing = _read_course_counts(path) if path.exists() else {}
+        for w, c in learned.items():
+            existing[w] = existing.get(w, 0) + c
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            "".join(f"{w} {c}\n" for w, c in sorted(existing.items(), key=lambda kv: (-kv[1], kv[0]))),
+            encoding="utf-8",
+        )
+        print(f"Learned {len(learned)} course terms -> {path}")
+    return sorted(learned)
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+def check_deck(data: dict, index: TypoIndex, extra_words: set[str] = frozenset(),
+               report_unknown: bool = False) -> list[dict]:
+    """
+    Return a slide-indexed list of suspected typos:
+    [{"index": 4, "title": "...", "typos": [{"word", "field", "suggestions"}]}]
+    """
+    report = []
+    suggestion_cache: dict[str, list[str]] = {}
+    for slide in data.get("slides", []):
+        typos = []
+        reported = set()
+        for field, text in _slide_texts(slide):
+            for word in iter_words(text):
+                w = word.lower()
+                if w in reported or w in extra_words or index.is_known(w):
+                    continue
+                if w not in suggestion_cache:
+                    suggestion_cache[w] = index.suggest(w)
+                suggestions = suggestion_cache[w]
+                if not suggestions and not report_unknown:
+                    continue
+                reported.add(w)
+                typos.append({"word": word, "field": field, "suggestions": suggestions})
+        if typos:
+            report.append({
+                "index": slide.get("index"),
+                "title": slide.get("title", ""),
+                "typos": typos,
+            })
+    return report
+
+
+def print_report(report: list[dict]):
+    if not report:
+        print("No suspected typos found.")
+        return
+    total = sum(len(s["typos"]) for s in report)
+    print(f"Suspected typos: {total} on {len(report)} slides\n")
+    for s in report:
+        print(f"Slide {s['index']}: {s['title']}")
+        for t in s["typos"]:
+            hint = ", ".join(t["suggestions"]) if t["suggestions"] else "(no suggestion)"
+            print(f"  [{t['field']}] {t['word']} -> {hint}")
+
+
+def check_typos(content_json: str, course: str = None, learn_from: list[str] = None,
+                report_path: str = None, report_unknown: bool = False) -> list[dict]:
+    with open(content_json, encoding="utf-8") as f:
+        data = json.load(f)
+
+    index = load_index(course)
+    extra_words: set[str] = set()
+    if learn_from:
+        extra_words = set(learn_course_vocab(course, learn_from, index))
+        if course:
+            index = load_index(course)  # pick up the updated course vocabulary
+
+    report = check_deck(data, index, extra_words, report_unknown)
+    print_report(report)
+
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump({"source_file": data.get("source_file", ""), "slides": report},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\nReport -> {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python check_typos.py <content.json> [--course CODE] "
+              "[--learn earlier.json ...] [--json report.json] [--all]")
+        sys.exit(1)
+
+    args = sys.argv[1:]
+    content_file = args[0]
+    course_code = None
+    learn_files = []
+    json_out = None
+    show_all = False
+    i = 1
+    while i < len(args):
+        if args[i] == "--course" and i + 1 < len(args):
+            course_code = args[i + 1]
+            i += 2
+        elif args[i] == "--json" and i + 1 < len(args):
+            json_out = args[i + 1]
+            i += 2
+        elif args[i] == "--learn":
+            i += 1
+            while i < len(args) and not args[i].startswith("--"):
+                learn_files.append(args[i])
+                i += 1
+        elif args[i] == "--all":
+            show_all = True
+            i += 1
+        else:
+            print(f"Unknown argument: {args[i]}")
+            sys.exit(1)
+
+    check_typos(content_file, course_code, learn_files, json_out, show_all)
@@ -5,45 +5,92 @@ Compiles a .tex file to PDF using pdflatex (run twice for correct page totals).
 All intermediate build files (.aux, .log, .nav, .snm, .toc, .out) are isolated
 in a temp subdirectory and cleaned up automatically after compilation.
 
+Output is byte-reproducible: the same .tex and images give the same PDF.
+pdflatex gets SOURCE_DATE_EPOCH (taken from the environment, or the fixed
+repro.REPRODUCIBLE_EPOCH) for the /CreationDate and /ModDate entries, the
+trailer /ID is dropped with \pdftrailerid{}, and \pdfsuppressptexinfo keeps
+build paths and the pdfTeX banner out of the file. \today is not affected.
+
 Usage:
-    python compile_latex.py <input.tex> [output_dir]
+    python compile_latex.py <input.tex> [output_dir] [--optimize] [--shards K]
+    python compile_latex.py --batch <input.tex|folder ...> [--output-dir DIR] [--optimize]
+
+Batch mode checkpoints progress in the job spool (job_spool.py): rerunning
+after a crash skips .tex files that were already compiled.
+
+--optimize shrinks the PDF afterwards (optimize_pdf.py); if that fails the
+unoptimized PDF is kept and the exit status is 1. In batch mode each file is
+optimized as part of its job, in a process pool while the next file compiles,
+so a resumed batch never leaves a compiled but unoptimized PDF behind.
+
+--shards K compiles a large beamer deck in K parallel pdflatex processes, each
+typesetting only its own frames (shard_latex.py); --shards 0 uses one per CPU
+core.
+
+Each pdflatex run goes through proc_runner.py with LATEX_TIMEOUT_S,
+LATEX_CPU_S and LATEX_MEMORY_MB limits, so a macro that loops forever
+fails that file instead of hanging a batch.
 """
 
+import os
 import sys
-import subprocess
 import shutil
 import tempfile
 from pathlib import Path
 
-# Known pdflatex locations (Windows MiKTeX / TeX Live)
-PDFLATEX_CANDIDATES = [
-    # MiKTeX Windows (user install)
-    r"C:\Users\10119\AppData\Local\Programs\MiKTeX\miktex\bin\x64\pdflatex",
-    # MiKTeX Windows (system install)
-    r"C:\Program Files\MiKTeX\miktex\bin\x64\pdflatex",
-    r"C:\Program Files (x86)\MiKTeX\miktex\bin\pdflatex",
-    # TeX Live (Linux/macOS)
-    "/usr/bin/pdflatex",
-    "/usr/local/bin/pdflatex",
-    "/Library/TeX/texbin/pdflatex",
-]
-
-
-def find_pdflatex():
-    if shutil.which("pdflatex"):
-        return "pdflatex"
-    for p in PDFLATEX_CANDIDATES:
-        if Path(p).exists():
-            return p
-    return None
-
-
-def compile_tex(tex_path: str, output_dir: str = None) -> str | None:
+# pdflatex discovery (and its cache) is shared with the dependency checker
+from ensure_deps import find_pdflatex
+from proc_runner import RunResult, run
+from repro import source_date_epoch
+
+# Limits per pdflatex pass
+LATEX_TIMEOUT_S = 300
+LATEX_CPU_S = 300
+LATEX_MEMORY_MB = 2048
+
+# Prepended to the document on the command line (see module docstring)
+REPRODUCIBLE_PREAMBLE = r"\pdftrailerid{}\pdfsuppressptexinfo=-1"
+
+
+def run_latex(args: list[str], cwd: Path, env: dict) -> RunResult:
+    return run(args, cwd=cwd, env=env, timeout=LATEX_TIMEOUT_S,
+               cpu_seconds=LATEX_CPU_S, memory_mb=LATEX_MEMORY_MB)
+
+
+def latex_failed(r: RunResult) -> bool:
+    """pdflatex exits non-zero for recoverable errors too; only these are fatal."""
+    if r.ok:
+        return False
+    return (r.returncode is None or r.timed_out or r.returncode < 0
+            or "Fatal error" in r.output)
+
+
+def print_log_tail(log: Path, n: int = 30):
+    """Show the end of a pdflatex log, where the fatal error is."""
+    if log.exists():
+        lines = log.read_text(encoding="utf-8", errors="ignore").splitlines()
+        for line in lines[-n:]:
+            if line.strip():
+                print(" ", line)
+
+
+def compile_tex(tex_path: str, output_dir: str = None, optimize: bool = False,
+                shards: int = 1) -> str | None:
     tex_path = Path(tex_path).resolve()
     if not tex_path.exists():
         print(f"ERROR: File not found: {tex_path}")
         return None
 
+    if shards != 1:
+        from shard_latex import compile_tex_sharded
+        dest = compile_tex_sharded(tex_path, output_dir, shards)
+        if dest and optimize:
+            from optimize_pdf import optimize_pdf
+            if optimize_pdf(dest) is None:
+                print(f"ERROR: Optimizing failed; kept the unoptimized PDF: {dest}")
+                return None
+        return dest
+
     pdflatex = find_pdflatex()
     if not pdflatex:
         print("ERROR: pdflatex not found. Install MiKTeX (Windows) or TeX Live (Linux/macOS).")
@@ -60,20 +107,17 @@ def compile_tex(tex_path: str, output_dir: str = None) -> str | None:
             pdflatex,
             "-interaction=nonstopmode",
             f"-output-directory={tmp_dir}",
-            tex_path.name,
+            f"-jobname={tex_path.stem}",
+            f"{REPRODUCIBLE_PREAMBLE}\\input{{{tex_path.name}}}",
         ]
+        env = {**os.environ, "SOURCE_DATE_EPOCH": str(source_date_epoch())}
 
         for pass_num in (1, 2):
             print(f"Compiling (pass {pass_num}): {tex_path.name}")
-            r = subprocess.run(args, cwd=tex_dir, capture_output=True, text=True)
-            if r.returncode != 0 and "Fatal error" in (r.stdout + r.stderr):
-                log = tmp_dir / tex_path.with_suffix(".log").name
-                if log.exists():
-                    lines = log.read_text(encoding="utf-8", errors="ignore").splitlines()
-                    for line in lines[-30:]:
-                        if line.strip():
-                            print(" ", line)
-                print("ERROR: LaTeX compilation failed.")
+            r = run_latex(args, tex_dir, env)
+            if latex_failed(r):
+                print_log_tail(tmp_dir / tex_path.with_suffix(".log").name)
+                print(f"ERROR: LaTeX compilation failed ({r.describe()}).")
                 return None
 
         pdf_in_tmp = tmp_dir / tex_path.with_suffix(".pdf").name
@@ -85,6 +129,11 @@ def compile_tex(tex_path: str, output_dir: str = None) -> str | None:
         dest = dest_dir / tex_path.with_suffix(".pdf").name
         shutil.copy2(pdf_in_tmp, dest)
         print(f"Done: {dest}")
+        if optimize:
+            from optimize_pdf import optimize_pdf
+            if optimize_pdf(str(dest)) is None:
+                print(f"ERROR: Optimizing failed; kept the unoptimized PDF: {dest}")
+                return None
         return str(dest)
 
     finally:
@@ -94,8 +143,39 @@ def compile_tex(tex_path: str, output_dir: str = None) -> str | None:
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python compile_latex.py <input.tex> [output_dir]")
+        print("Usage: python compile_latex.py <input.tex> [output_dir] [--optimize] [--shards K]")
+        print("       python compile_latex.py --batch <input.tex|folder ...> [--output-dir DIR] [--optimize]")
         sys.exit(1)
 
-    result = compile_tex(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    cli_args = sys.argv[1:]
+    do_optimize = "--optimize" in cli_args
+    if do_optimize:
+        cli_args.remove("--optimize")
+    n_shards = 1
+    if "--shards" in cli_args:
+        i = cli_args.index("--shards")
+        n_shards = int(cli_args[i + 1])
+        del cli_args[i:i + 2]
+
+    if cli_args[0] == "--batch":
+        from job_spool import expand_inputs, run_batch
+
+        batch_args = cli_args[1:]
+        out_dir = None
+        if "--output-dir" in batch_args:
+            i = batch_args.index("--output-dir")
+            out_dir = batch_args[i + 1]
+            del batch_args[i:i + 2]
+        post = None
+        if do_optimize:
+            from optimize_pdf import optimize_pdf as post  # a failure recompiles the file
+
+        ok = run_batch("compile", expand_inputs(batch_args, ".tex"),
+                       lambda tex: compile_tex(tex, out_dir), post=post,
+                       params={"output_dir": str(Path(out_dir).resolve()) if out_dir else None,
+                               "optimize": do_optimize})
+        sys.exit(0 if ok else 1)
+
+    result = compile_tex(cli_args[0], cli_args[1] if len(cli_args) > 1 else None,
+                         optimize=do_optimize, shards=n_shards)
     sys.exit(0 if result else 1)
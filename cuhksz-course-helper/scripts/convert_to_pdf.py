@@ -3,7 +3,16 @@ CUHKsz Course Helper - PDF Converter
 Converts PPTX to PDF using available system tools.
 
 Usage:
-    python convert_to_pdf.py <input.pptx> [output.pdf]
+    python convert_to_pdf.py <input.pptx> [output.pdf] [--optimize]
+    python convert_to_pdf.py --batch <input.pptx|folder ...> [--optimize]
+
+Batch mode writes <name>.pdf next to each deck and checkpoints progress in
+the job spool (job_spool.py): rerunning after a crash skips finished decks.
+
+--optimize shrinks the PDF afterwards (optimize_pdf.py); if that fails the
+unoptimized PDF is kept and the exit status is 1. In batch mode each deck is
+optimized as part of its job, in a process pool while the next deck converts,
+so a resumed batch never leaves a converted but unoptimized PDF behind.
 
 Methods tried in order:
     1. Microsoft PowerPoint COM (Windows only, best quality)
@@ -12,9 +21,17 @@ Methods tried in order:
 """
 
 import sys
-import subprocess
 from pathlib import Path
 
+# soffice discovery (and its cache) is shared with the dependency checker
+from ensure_deps import find_soffice
+from proc_runner import run
+
+# Limits per LibreOffice conversion; soffice runs in its own process group
+# so a hung conversion does not leave soffice.bin behind
+SOFFICE_TIMEOUT_S = 120
+SOFFICE_CPU_S = 120
+
 
 def convert_via_powerpoint_com(pptx_path: str, pdf_path: str) -> bool:
     """Convert using PowerPoint COM automation (Windows, best quality)."""
@@ -34,21 +51,28 @@ def convert_via_powerpoint_com(pptx_path: str, pdf_path: str) -> bool:
 
 def convert_via_libreoffice(pptx_path: str, output_dir: str) -> bool:
     """Convert using LibreOffice headless mode."""
-    commands = [
-        ["libreoffice", "--headless", "--convert-to", "pdf", "--outdir", output_dir, pptx_path],
-        ["soffice", "--headless", "--convert-to", "pdf", "--outdir", output_dir, pptx_path],
-    ]
-    for cmd in commands:
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-            if result.returncode == 0:
-                return True
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            continue
-    return False
-
-
-def convert_pptx_to_pdf(pptx_path: str, pdf_path: str = None) -> str:
+    soffice = find_soffice()
+    if not soffice:
+        print("  LibreOffice not found.")
+        return False
+    cmd = [soffice, "--headless", "--convert-to", "pdf", "--outdir", output_dir, pptx_path]
+    # Own process group: on timeout soffice.bin is killed along with soffice
+    result = run(cmd, timeout=SOFFICE_TIMEOUT_S, cpu_seconds=SOFFICE_CPU_S)
+    if not result.ok:
+        print(f"  LibreOffice failed: {result.describe()}")
+    return result.ok
+
+
+def _finish(pdf_path: str, optimize: bool) -> str | None:
+    if optimize:
+        from optimize_pdf import optimize_pdf
+        if optimize_pdf(pdf_path) is None:
+            print(f"ERROR: Optimizing failed; kept the unoptimized PDF: {pdf_path}")
+            return None
+    return pdf_path
+
+
+def convert_pptx_to_pdf(pptx_path: str, pdf_path: str = None, optimize: bool = False) -> str:
     pptx_path = str(Path(pptx_path).resolve())
     if not pdf_path:
         pdf_path = str(Path(pptx_path).with_suffix(".pdf"))
@@ -60,7 +84,7 @@ def convert_pptx_to_pdf(pptx_path: str, pdf_path: str = None) -> str:
     print("Trying PowerPoint COM...")
     if convert_via_powerpoint_com(pptx_path, pdf_path):
         print(f"Done (PowerPoint COM): {pdf_path}")
-        return pdf_path
+        return _finish(pdf_path, optimize)
 
     # Try LibreOffice
     print("Trying LibreOffice...")
@@ -71,7 +95,7 @@ def convert_pptx_to_pdf(pptx_path: str, pdf_path: str = None) -> str:
         if expected.exists() and str(expected) != pdf_path:
             expected.rename(pdf_path)
         print(f"Done (LibreOffice): {pdf_path}")
-        return pdf_path
+        return _finish(pdf_path, optimize)
 
     # Neither method worked
     print("\nERROR: Could not convert to PDF automatically.")
@@ -84,10 +108,27 @@ def convert_pptx_to_pdf(pptx_path: str, pdf_path: str = None) -> str:
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python convert_to_pdf.py <input.pptx> [output.pdf]")
+        print("Usage: python convert_to_pdf.py <input.pptx> [output.pdf] [--optimize]")
+        print("       python convert_to_pdf.py --batch <input.pptx|folder ...> [--optimize]")
         sys.exit(1)
 
-    pptx = sys.argv[1]
-    pdf = sys.argv[2] if len(sys.argv) > 2 else None
-    result = convert_pptx_to_pdf(pptx, pdf)
+    cli_args = sys.argv[1:]
+    do_optimize = "--optimize" in cli_args
+    if do_optimize:
+        cli_args.remove("--optimize")
+
+    if cli_args[0] == "--batch":
+        from job_spool import expand_inputs, run_batch
+
+        post = None
+        if do_optimize:
+            from optimize_pdf import optimize_pdf as post  # a failure converts the deck again
+
+        ok = run_batch("convert", expand_inputs(cli_args[1:], ".pptx"), convert_pptx_to_pdf,
+                       post=post, params={"optimize": do_optimize})
+        sys.exit(0 if ok else 1)
+
+    pptx = cli_args[0]
+    pdf = cli_args[1] if len(cli_args) > 1 else None
+    result = convert_pptx_to_pdf(pptx, pdf, optimize=do_optimize)
     sys.exit(0 if result else 1)
@@ -0,0 +1,273 @@
+"""
+CUHKsz Course Helper - Unified Command Line
+One entry point for every script, run in a single interpreter.
+
+Heavy modules (python-pptx, PyMuPDF, comtypes) are imported only inside the
+subcommand that needs them, so `--help` and `deps --fast` stay fast. `run`
+chains the steps in-process and hands the extracted slides to the builder as
+a dict instead of through a temp JSON file.
+
+Usage:
+    python course_helper.py deps [--fast]
+    python course_helper.py extract <input.pptx> [output.json]
+    python course_helper.py inspect <input.pptx|folder ...> [--json] [--jobs N]
+    python course_helper.py typos <content.json> [--course CODE] [--learn earlier.json ...]
+    python course_helper.py build <content.json> <output.pptx> [--template math|cs|stats]
+    python course_helper.py compile <input.tex> [output_dir] [--optimize] [--shards K]
+    python course_helper.py convert <input.pptx> [output.pdf] [--optimize]
+    python course_helper.py optimize <file.pdf ...> [--quality Q] [--dpi D] [--jobs N]
+    python course_helper.py thumbnails <file.pdf ...> [--out DIR] [--dpi D] [--grid CxR] [--html]
+    python course_helper.py merge <manifest.txt | file.pdf ...> [--out pack.pdf] [--title T] [--linearize]
+    python course_helper.py run <input.pptx> [--template math|cs|stats] [--tex file.tex]
+    python course_helper.py pipeline <folder|file ...> [--template T] [--jobs N] [--watch]
+    python course_helper.py bench [--repeat N]
+
+`run` without --tex: extract -> build_pptx -> convert to PDF
+(<name>_updated.pptx / <name>_updated.pdf next to the input).
+`run` with --tex: extract (images/ for \\includegraphics) -> compile the .tex.
+"""
+
+import argparse
+import sys
+
+
+HELP_BUDGET_MS = 50
+
+
+# ── Subcommands ───────────────────────────────────────────────────────────────
+def cmd_deps(args) -> bool:
+    from ensure_deps import check_all
+    return check_all(fast=args.fast)
+
+
+def cmd_extract(args) -> bool:
+    from extract_content import extract_pptx
+    return extract_pptx(args.input, args.output) is not None
+
+
+def cmd_inspect(args) -> bool:
+    from inspect_pptx import list_decks
+    return list_decks(args.inputs, args.json, args.jobs)
+
+
+def cmd_typos(args) -> bool:
+    from check_typos import check_typos
+    check_typos(args.input, args.course, args.learn, args.json, args.all)
+    return True
+
+
+def cmd_build(args) -> bool:
+    from build_pptx import build_pptx
+    return build_pptx(args.input, args.output, template_name=args.template,
+                      course_code=args.course_code) is not None
+
+
+def cmd_compile(args) -> bool:
+    from compile_latex import compile_tex
+    return compile_tex(args.input, args.output_dir, optimize=args.optimize,
+                       shards=args.shards) is not None
+
+
+def cmd_convert(args) -> bool:
+    from convert_to_pdf import convert_pptx_to_pdf
+    return convert_pptx_to_pdf(args.input, args.output, optimize=args.optimize) is not None
+
+
+def cmd_optimize(args) -> bool:
+    from optimize_pdf import optimize_pdfs
+    results = optimize_pdfs(args.inputs, args.jobs, args.quality, args.dpi, not args.no_linearize)
+    return bool(results) and all(results)
+
+
+def cmd_thumbnails(args) -> bool:
+    from pathlib import Path
+    from thumbnails import make_thumbnails
+    cols, rows = (int(n) for n in args.grid.lower().split("x"))
+    ok = True
+    for pdf in args.inputs:
+        out = (str(Path(args.out) / f"{Path(pdf).stem}_thumbs")
+               if args.out and len(args.inputs) > 1 else args.out)
+        ok = make_thumbnails(pdf, out, args.dpi, (cols, rows), args.html,
+                             args.jobs, args.cache_mb) is not None and ok
+    return ok
+
+
+def cmd_merge(args) -> bool:
+    from merge_pdf import merge_manifest
+    return merge_manifest(args.inputs, args.out, args.title, args.linearize,
+                          not args.no_frame_titles) is not None
+
+
+def cmd_run(args) -> bool:
+    from pathlib import Path
+    from extract_content import extract_pptx
+
+    src = Path(args.input).resolve()
+    print(f"[1/3] Extracting {src.name}")
+    data = extract_pptx(str(src), args.json, print_json=False)
+
+    if args.tex:
+        from compile_latex import compile_tex
+        print(f"[2/3] Using hand-written {Path(args.tex).name} (skipping build_pptx)")
+        print("[3/3] Compiling")
+        return compile_tex(args.tex) is not None
+
+    from build_pptx import build_pptx
+    from convert_to_pdf import convert_pptx_to_pdf
+
+    out_pptx = src.with_name(f"{src.stem}_updated.pptx")
+    print(f"[2/3] Building {out_pptx.name}")
+    if build_pptx(data, str(out_pptx), template_name=args.template,
+                  course_code=args.course_code) is None:
+        return False
+    print("[3/3] Converting to PDF")
+    return convert_pptx_to_pdf(str(out_pptx)) is not None
+
+
+def cmd_pipeline(args) -> bool:
+    from pipeline import run_pipeline
+    return run_pipeline(args.inputs, args.template, args.jobs, args.mem_mb, args.watch)
+
+
+def cmd_bench(args) -> bool:
+    """Report start-up cost: `--help` wall time and per-module import time."""
+    import statistics
+    import subprocess
+    import time
+    from pathlib import Path
+
+    here = Path(__file__).resolve()
+    help_ms = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, str(here), "--help"], capture_output=True)
+        help_ms.append((time.perf_counter() - t0) * 1000)
+    median = statistics.median(help_ms)
+    status = "OK" if median <= HELP_BUDGET_MS else "SLOW"
+    print(f"course_helper --help: median {median:.1f} ms, min {min(help_ms):.1f} ms "
+          f"over {args.repeat} runs [{status}, budget {HELP_BUDGET_MS} ms]")
+
+    probe = ("import sys, time; sys.path.insert(0, sys.argv[1]); t = time.perf_counter(); "
+             "__import__(sys.argv[2]); print((time.perf_counter() - t) * 1000)")
+    print("\nImport time (fresh interpreter each):")
+    for module in ("course_helper", "ensure_deps", "compile_latex", "convert_to_pdf",
+                   "check_typos", "extract_content", "build_pptx", "pptx", "fitz"):
+        r = subprocess.run([sys.executable, "-c", probe, str(here.parent), module],
+                           capture_output=True, text=True)
+        if r.returncode == 0:
+            print(f"  {module:<16} {float(r.stdout.strip().splitlines()[-1]):8.1f} ms")
+        else:
+            print(f"  {module:<16}      n/a (not importable)")
+    return median <= HELP_BUDGET_MS
+
+
+# ── Argument parsing ──────────────────────────────────────────────────────────
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="course-helper",
+        description="CUHKsz Course Helper — extract, rebuild, compile and convert course materials.",
+    )
+    sub = parser.add_subparsers(dest="command", metavar="<command>")
+    sub.required = True
+
+    p = sub.add_parser("deps", help="check and install dependencies")
+    p.add_argument("--fast", action="store_true", help="answer from the cached probe if valid")
+    p.set_defaults(func=cmd_deps)
+
+    p = sub.add_parser("extract", help="extract PPTX content + images to JSON")
+    p.add_argument("input")
+    p.add_argument("output", nargs="?")
+    p.set_defaults(func=cmd_extract)
+
+    p = sub.add_parser("inspect", help="slide counts, titles, notes and media per deck (no extraction)")
+    p.add_argument("inputs", nargs="+", help=".pptx files or folders")
+    p.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    p.add_argument("--jobs", type=int)
+    p.set_defaults(func=cmd_inspect)
+
+    p = sub.add_parser("typos", help="list suspected typos in extracted JSON")
+    p.add_argument("input")
+    p.add_argument("--course")
+    p.add_argument("--learn", nargs="+", default=[])
+    p.add_argument("--json")
+    p.add_argument("--all", action="store_true")
+    p.set_defaults(func=cmd_typos)
+
+    p = sub.add_parser("build", help="build a templated PPTX from JSON")
+    p.add_argument("input")
+    p.add_argument("output")
+    p.add_argument("--template", default="math", choices=["math", "cs", "stats"])
+    p.add_argument("--course-code", default="")
+    p.set_defaults(func=cmd_build)
+
+    p = sub.add_parser("compile", help="compile .tex to PDF with pdflatex")
+    p.add_argument("input")
+    p.add_argument("output_dir", nargs="?")
+    p.add_argument("--optimize", action="store_true", help="shrink the PDF afterwards")
+    p.add_argument("--shards", type=int, default=1, metavar="K",
+                   help="compile a large beamer deck in K parallel processes, each "
+                        "typesetting its own frames (0 = one per CPU)")
+    p.set_defaults(func=cmd_compile)
+
+    p = sub.add_parser("convert", help="convert PPTX to PDF")
+    p.add_argument("input")
+    p.add_argument("output", nargs="?")
+    p.add_argument("--optimize", action="store_true", help="shrink the PDF afterwards")
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser("optimize", help="dedupe/recompress/linearize PDFs in a process pool")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("--quality", type=int, default=75)
+    p.add_argument("--dpi", type=int, default=150)
+    p.add_argument("--jobs", type=int)
+    p.add_argument("--no-linearize", action="store_true")
+    p.set_defaults(func=cmd_optimize)
+
+    p = sub.add_parser("thumbnails", help="cached page thumbnails as contact sheets or an HTML gallery")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("--out", help="output folder (default: <name>_thumbs next to the PDF)")
+    p.add_argument("--dpi", type=int, default=36)
+    p.add_argument("--grid", default="4x5", help="contact sheet COLSxROWS")
+    p.add_argument("--html", action="store_true", help="write an HTML gallery instead of sheets")
+    p.add_argument("--jobs", type=int)
+    p.add_argument("--cache-mb", type=int, default=512)
+    p.set_defaults(func=cmd_thumbnails)
+
+    p = sub.add_parser("merge", help="merge a manifest of PDFs into one course pack with bookmarks")
+    p.add_argument("inputs", nargs="+", help="manifest file, or PDFs in order")
+    p.add_argument("--out", help="output PDF (default: <manifest>.pdf)")
+    p.add_argument("--title", help="PDF title of the pack")
+    p.add_argument("--linearize", action="store_true")
+    p.add_argument("--no-frame-titles", action="store_true", help="only document-level bookmarks")
+    p.set_defaults(func=cmd_merge)
+
+    p = sub.add_parser("run", help="extract -> build/compile -> convert in one process")
+    p.add_argument("input")
+    p.add_argument("--template", default="math", choices=["math", "cs", "stats"])
+    p.add_argument("--course-code", default="")
+    p.add_argument("--tex", help="hand-written .tex to compile instead of building a PPTX")
+    p.add_argument("--json", help="also write the extracted JSON here")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("pipeline", help="rebuild decks as a parallel task DAG (optionally --watch)")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("--template", choices=["math", "cs", "stats"])
+    p.add_argument("--jobs", type=int)
+    p.add_argument("--mem-mb", type=int)
+    p.add_argument("--watch", action="store_true")
+    p.set_defaults(func=cmd_pipeline)
+
+    p = sub.add_parser("bench", help="report --help wall time and module import times")
+    p.add_argument("--repeat", type=int, default=10)
+    p.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return 0 if args.func(args) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
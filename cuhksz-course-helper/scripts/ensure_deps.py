@@ -2,30 +2,46 @@
 CUHKsz Course Helper - Dependency Checker & Auto-Installer
 
 Checks all required dependencies and installs any that are missing:
-  - Python packages: python-pptx, pymupdf
+  - Python packages: python-pptx, pymupdf, numpy
   - LaTeX distribution: pdflatex (MiKTeX on Windows, MacTeX on macOS, TeX Live on Linux)
+  - LibreOffice (soffice) is located but never installed; it is optional
+
+Packages are probed through their installed metadata, never imported. The
+results (package versions, pdflatex / soffice paths, interpreter fingerprint)
+are cached in ~/.cache/cuhksz-course-helper/deps.json and revalidated against
+the mtimes of the site-packages directories and tool executables.
+compile_latex.py and convert_to_pdf.py use the same cached discovery via
+find_pdflatex() / find_soffice().
 
 Usage:
-    python ensure_deps.py
+    python ensure_deps.py [--fast]
+
+    --fast   answer from the cache when it is still valid (milliseconds);
+             falls back to the full check otherwise
 
 Returns exit code 0 if all dependencies are satisfied after the run, 1 otherwise.
 """
 
+import json
+import os
 import sys
-import subprocess
+import site
 import shutil
 import platform
 from pathlib import Path
 
+from proc_runner import run
+
 
 # ── Python packages ───────────────────────────────────────────────────────────
 # (pip_name, import_name)
 PYTHON_PACKAGES = [
     ("python-pptx", "pptx"),
     ("pymupdf",     "fitz"),
+    ("numpy",       "numpy"),  # decorative image detection (image_hash.py)
 ]
 
-# ── pdflatex search paths (same as compile_latex.py) ─────────────────────────
+# ── pdflatex search paths (also used by compile_latex.py) ────────────────────
 PDFLATEX_CANDIDATES = [
     r"C:\Users\10119\AppData\Local\Programs\MiKTeX\miktex\bin\x64\pdflatex",
     r"C:\Program Files\MiKTeX\miktex\bin\x64\pdflatex",
@@ -35,66 +51,189 @@ PDFLATEX_CANDIDATES = [
     "/Library/TeX/texbin/pdflatex",
 ]
 
+# ── soffice search paths (used by convert_to_pdf.py) ─────────────────────────
+SOFFICE_CANDIDATES = [
+    r"C:\Program Files\LibreOffice\program\soffice.exe",
+    r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+    "/Applications/LibreOffice.app/Contents/MacOS/soffice",
+    "/usr/bin/soffice",
+    "/usr/bin/libreoffice",
+    "/usr/local/bin/soffice",
+    "/opt/libreoffice/program/soffice",
+]
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "cuhksz-course-helper"
+DEPS_CACHE = CACHE_DIR / "deps.json"
+
+# Wall-clock limits for installers run through proc_runner.py
+PIP_TIMEOUT_S = 600
+INSTALL_TIMEOUT_S = 3600
+
+
+# ── Discovery cache ───────────────────────────────────────────────────────────
+def _mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _interpreter_fingerprint() -> dict:
+    """Identify this interpreter and the state of the directories pip installs into."""
+    dirs = list(site.getsitepackages()) if hasattr(site, "getsitepackages") else []
+    user_site = site.getusersitepackages() if hasattr(site, "getusersitepackages") else None
+    if user_site:
+        dirs.append(user_site)
+    return {
+        "executable": sys.executable,
+        "version": sys.version,
+        "site_mtimes": {d: _mtime(d) for d in dirs},
+    }
+
+
+def _load_cache() -> dict:
+    try:
+        return json.loads(DEPS_CACHE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_cache(**entries):
+    """Merge entries into the cache file (atomic replace; failures are ignored)."""
+    data = _load_cache()
+    data.update(entries)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = DEPS_CACHE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        tmp.replace(DEPS_CACHE)
+    except OSError:
+        pass
+
+
+def _cached_tool(name: str, discover, use_cache: bool) -> str | None:
+    """
+    Return the cached path for tool `name` if its executable is unchanged,
+    otherwise run discover() and cache the result. Negative results are not
+    trusted from the cache, so a later install is picked up immediately.
+    """
+    if use_cache:
+        entry = _load_cache().get(name)
+        if entry and entry.get("path") and _mtime(entry["path"]) == entry.get("mtime"):
+            return entry["path"]
+    path = discover()
+    _update_cache(**{name: {"path": path, "mtime": _mtime(path) if path else None}})
+    return path
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 def _pip_install(pip_name: str) -> bool:
     """Install a Python package via pip. Returns True on success."""
     print(f"  Installing {pip_name} ...")
-    result = subprocess.run(
-        [sys.executable, "-m", "pip", "install", "--quiet", pip_name],
-        capture_output=True, text=True,
-    )
-    if result.returncode == 0:
+    result = run([sys.executable, "-m", "pip", "install", "--quiet", pip_name],
+                 timeout=PIP_TIMEOUT_S)
+    if result.ok:
         print(f"  OK: {pip_name} installed.")
         return True
-    print(f"  FAILED: {result.stderr.strip()}")
+    print(f"  FAILED: {result.stderr.strip() or result.describe()}")
     return False
 
 
+def _package_version(pip_name: str, import_name: str) -> str | None:
+    """Installed version from package metadata, without importing the package."""
+    from importlib import metadata, util  # deferred: not needed on the --fast path
+    try:
+        return metadata.version(pip_name)
+    except metadata.PackageNotFoundError:
+        pass
+    # No dist-info (e.g. vendored or copied in): locate the module without executing it
+    return "unknown" if util.find_spec(import_name) is not None else None
+
+
+def probe_python_packages(use_cache: bool = True) -> dict[str, str | None]:
+    """Return {pip_name: version or None}, from the cache when the interpreter is unchanged."""
+    fingerprint = _interpreter_fingerprint()
+    if use_cache:
+        cache = _load_cache()
+        if cache.get("interpreter") == fingerprint and "packages" in cache:
+            return cache["packages"]
+    packages = {
+        pip_name: _package_version(pip_name, import_name)
+        for pip_name, import_name in PYTHON_PACKAGES
+    }
+    _update_cache(interpreter=fingerprint, packages=packages)
+    return packages
+
+
 def check_python_packages() -> bool:
     """Check and install required Python packages. Returns True if all OK."""
-    import importlib
     all_ok = True
-    for pip_name, import_name in PYTHON_PACKAGES:
-        try:
-            importlib.import_module(import_name)
-            print(f"  OK: {pip_name}")
-        except ImportError:
-            print(f"  MISSING: {pip_name}")
-            if not _pip_install(pip_name):
-                all_ok = False
+    installed = False
+    for pip_name, version in probe_python_packages(use_cache=False).items():
+        if version:
+            print(f"  OK: {pip_name} {version}")
+            continue
+        print(f"  MISSING: {pip_name}")
+        if _pip_install(pip_name):
+            installed = True
+        else:
+            all_ok = False
+    if installed:
+        # Refresh the cache with the newly installed versions
+        probe_python_packages(use_cache=False)
     return all_ok
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-def find_pdflatex() -> str | None:
-    """Return path to pdflatex executable, or None if not found."""
-    if shutil.which("pdflatex"):
-        return shutil.which("pdflatex")
+def _discover_pdflatex() -> str | None:
+    found = shutil.which("pdflatex")
+    if found:
+        return found
     for p in PDFLATEX_CANDIDATES:
         if Path(p).exists():
             return p
     return None
 
 
+def _discover_soffice() -> str | None:
+    for name in ("soffice", "libreoffice"):
+        found = shutil.which(name)
+        if found:
+            return found
+    for p in SOFFICE_CANDIDATES:
+        if Path(p).exists():
+            return p
+    return None
+
+
+def find_pdflatex(use_cache: bool = True) -> str | None:
+    """Return path to pdflatex executable, or None if not found."""
+    return _cached_tool("pdflatex", _discover_pdflatex, use_cache)
+
+
+def find_soffice(use_cache: bool = True) -> str | None:
+    """Return path to the LibreOffice soffice executable, or None if not found."""
+    return _cached_tool("soffice", _discover_soffice, use_cache)
+
+
 def _install_latex_windows() -> bool:
     """Install MiKTeX on Windows via winget. Returns True on success."""
     if not shutil.which("winget"):
         print("  winget not available. Download MiKTeX manually from https://miktex.org/download")
         return False
     print("  Installing MiKTeX via winget (this may take several minutes) ...")
-    result = subprocess.run(
+    result = run(
         ["winget", "install", "--id", "MiKTeX.MiKTeX", "-e", "--silent", "--accept-package-agreements", "--accept-source-agreements"],
-        capture_output=True, text=True,
+        timeout=INSTALL_TIMEOUT_S,
     )
-    if result.returncode == 0:
+    if result.ok:
         print("  OK: MiKTeX installed. You may need to open a new terminal for pdflatex to be on PATH.")
         return True
     # winget sometimes returns non-zero even on success (e.g. already installed)
     if "successfully installed" in result.stdout.lower() or "no applicable upgrade" in result.stdout.lower():
         print("  OK: MiKTeX already installed or just installed.")
         return True
-    print(f"  winget output: {result.stdout.strip()}")
+    print(f"  winget output: {result.stdout.strip() or result.describe()}")
     print("  If installation failed, download MiKTeX from https://miktex.org/download")
     return False
 
@@ -103,56 +242,52 @@ def _install_latex_macos() -> bool:
     """Install BasicTeX on macOS via Homebrew. Returns True on success."""
     if shutil.which("brew"):
         print("  Installing BasicTeX via Homebrew (this may take a few minutes) ...")
-        result = subprocess.run(
-            ["brew", "install", "--cask", "basictex"],
-            capture_output=True, text=True,
-        )
-        if result.returncode == 0:
+        result = run(["brew", "install", "--cask", "basictex"], timeout=INSTALL_TIMEOUT_S)
+        if result.ok:
             print("  OK: BasicTeX installed. Run: sudo tlmgr update --self && sudo tlmgr install collection-latexextra")
             return True
-        print(f"  Homebrew error: {result.stderr.strip()}")
+        print(f"  Homebrew error: {result.stderr.strip() or result.describe()}")
     print("  Download MacTeX from https://www.tug.org/mactex/ or install Homebrew first: https://brew.sh")
     return False
 
 
+def _sudo_install(cmd: list[str]):
+    """Run a package-manager command with sudo (a missing sudo is a failed result)."""
+    # Stays in the terminal's session so sudo can still ask for a password
+    return run(["sudo", *cmd], timeout=INSTALL_TIMEOUT_S, isolate=False)
+
+
 def _install_latex_linux() -> bool:
     """Install TeX Live on Linux. Returns True on success."""
     # Try apt (Debian/Ubuntu)
     if shutil.which("apt-get"):
         print("  Installing texlive-full via apt-get (this may take several minutes) ...")
-        result = subprocess.run(
-            ["sudo", "apt-get", "install", "-y", "texlive-full"],
-            capture_output=True, text=True,
-        )
-        if result.returncode == 0:
+        result = _sudo_install(["apt-get", "install", "-y", "texlive-full"])
+        if result.ok:
             print("  OK: texlive-full installed.")
             return True
         # Try smaller package as fallback
         print("  Trying texlive-latex-extra instead ...")
-        result2 = subprocess.run(
-            ["sudo", "apt-get", "install", "-y", "texlive-latex-extra"],
-            capture_output=True, text=True,
-        )
-        if result2.returncode == 0:
+        result2 = _sudo_install(["apt-get", "install", "-y", "texlive-latex-extra"])
+        if result2.ok:
             print("  OK: texlive-latex-extra installed.")
             return True
+        print(f"  apt-get: {result2.describe()}")
     # Try dnf (Fedora/RHEL)
     if shutil.which("dnf"):
         print("  Installing texlive via dnf ...")
-        result = subprocess.run(
-            ["sudo", "dnf", "install", "-y", "texlive-scheme-full"],
-            capture_output=True, text=True,
-        )
-        if result.returncode == 0:
+        result = _sudo_install(["dnf", "install", "-y", "texlive-scheme-full"])
+        if result.ok:
             print("  OK: texlive installed.")
             return True
+        print(f"  dnf: {result.describe()}")
     print("  Could not auto-install LaTeX. Install manually: https://www.tug.org/texlive/")
     return False
 
 
 def check_pdflatex() -> bool:
     """Check and install pdflatex. Returns True if available after check."""
-    path = find_pdflatex()
+    path = find_pdflatex(use_cache=False)
     if path:
         print(f"  OK: pdflatex found at {path}")
         return True
@@ -160,15 +295,45 @@ def check_pdflatex() -> bool:
     print("  MISSING: pdflatex not found.")
     system = platform.system()
     if system == "Windows":
-        return _install_latex_windows()
+        ok = _install_latex_windows()
     elif system == "Darwin":
-        return _install_latex_macos()
+        ok = _install_latex_macos()
     else:
-        return _install_latex_linux()
+        ok = _install_latex_linux()
+    find_pdflatex(use_cache=False)  # record the fresh install (if now on PATH)
+    return ok
+
+
+def fast_check() -> bool:
+    """
+    Answer from the cache only. Returns True if the cache is valid and every
+    required dependency was present; False means "run the full check".
+    """
+    cache = _load_cache()
+    if cache.get("interpreter") != _interpreter_fingerprint():
+        return False
+    packages = cache.get("packages") or {}
+    if not packages or not all(packages.get(pip_name) for pip_name, _ in PYTHON_PACKAGES):
+        return False
+    entry = cache.get("pdflatex") or {}
+    if not entry.get("path") or _mtime(entry["path"]) != entry.get("mtime"):
+        return False
+    for pip_name, _ in PYTHON_PACKAGES:
+        print(f"  OK: {pip_name} {packages[pip_name]}")
+    print(f"  OK: pdflatex found at {entry['path']}")
+    soffice = (cache.get("soffice") or {}).get("path")
+    if soffice:
+        print(f"  OK: soffice found at {soffice}")
+    return True
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-def main():
+def check_all(fast: bool = False) -> bool:
+    """Run the dependency check (installing what is missing). Returns True if all OK."""
+    if fast and fast_check():
+        print("All dependencies satisfied (cached). Ready to use.")
+        return True
+
     print("=== CUHKsz Course Helper — Dependency Check ===\n")
 
     print("[1/2] Python packages:")
@@ -177,17 +342,27 @@ def main():
     print("\n[2/2] LaTeX (pdflatex):")
     latex_ok = check_pdflatex()
 
+    soffice = find_soffice(use_cache=False)
+    print("\nOptional: LibreOffice (PPTX -> PDF):")
+    if soffice:
+        print(f"  OK: soffice found at {soffice}")
+    else:
+        print("  Not found. convert_to_pdf.py will rely on PowerPoint COM.")
+
     print()
     if py_ok and latex_ok:
         print("All dependencies satisfied. Ready to use.")
-        sys.exit(0)
-    else:
-        if not py_ok:
-            print("WARNING: Some Python packages could not be installed.")
-        if not latex_ok:
-            print("WARNING: pdflatex is not available. PDF compilation will fail.")
-            print("         Install a LaTeX distribution and re-run this script.")
-        sys.exit(1)
+        return True
+    if not py_ok:
+        print("WARNING: Some Python packages could not be installed.")
+    if not latex_ok:
+        print("WARNING: pdflatex is not available. PDF compilation will fail.")
+        print("         Install a LaTeX distribution and re-run this script.")
+    return False
+
+
+def main():
+    sys.exit(0 if check_all(fast="--fast" in sys.argv[1:]) else 1)
 
 
 if __name__ == "__main__":
@@ -3,17 +3,34 @@ CUHKsz Course Helper - Content Extraction Script
 Extracts structured content AND images from PPTX files.
 
 Usage:
-    python extract_content.py <input.pptx> [output.json]
+    python extract_content.py <input.pptx> [output.json] [--keep-decorative]
+    python extract_content.py --batch <input.pptx|folder ...>
+    python extract_content.py --list <input.pptx|folder ...> [--json]
 
-Images are saved to an 'images/' subfolder next to the output JSON (or PPTX).
-The JSON 'image_paths' field contains relative paths like "images/slide_01_img_01.png"
-for use directly in \\includegraphics{} commands.
+--list only reports slide counts, titles, notes and media per deck, read
+straight from the zip without extracting anything (inspect_pptx.py).
+
+Batch mode writes <name>_content.json next to each deck and checkpoints
+progress in the job spool (job_spool.py): rerunning after a crash skips
+decks that were already extracted.
+
+Images are saved to an 'images/<deck>/' subfolder next to the output JSON (or
+PPTX), one folder per deck so decks in the same folder never overwrite each
+other's images. The JSON 'image_paths' field contains relative paths like
+"images/lecture01/slide_01_img_01.png" for use directly in \\includegraphics{}
+commands.
+
+Images that recur on many slides (logos, watermarks, backgrounds) are detected
+by perceptual hash (image_hash.py) and listed under 'decorative_images'
+instead of 'image_paths', so they are not re-included on every frame. Pass
+--keep-decorative to leave them in 'image_paths' as well. Detection needs
+NumPy; without it every image stays in 'image_paths'.
 
 Output JSON structure:
 {
   "source_file": "filename.pptx",
   "slide_count": N,
-  "images_dir": "/absolute/path/to/images",
+  "images_dir": "/absolute/path/to/images/<deck>",
   "slides": [
     {
       "index": 1,
@@ -22,17 +39,19 @@ Output JSON structure:
       "body_text": ["..."],
       "notes": "...",
       "has_images": true/false,
-      "image_paths": ["images/slide_01_img_01.png"],
+      "image_paths": ["images/lecture01/slide_01_img_01.png"],
+      "decorative_images": ["images/lecture01/slide_01_img_02.png"],
       "layout_name": "..."
     }
   ]
 }
 """
 
-import json
 import sys
 from pathlib import Path
 
+from slide_io import dumps, read_json, write_json
+
 try:
     from pptx import Presentation
     from pptx.util import Pt
@@ -115,8 +134,8 @@ def extract_text_from_shape(shape):
     return lines
 
 
-def _save_picture(shape, filepath: Path) -> bool:
-    """Save a Picture shape's image blob to filepath. Returns True on success."""
+def _save_picture(shape, filepath: Path) -> Path | None:
+    """Save a Picture shape's image blob to filepath. Returns the path written, or None."""
     try:
         image = shape.image
         ext = image.ext.lower()
@@ -125,17 +144,18 @@ def _save_picture(shape, filepath: Path) -> bool:
         # Update extension in filepath if needed
         filepath = filepath.with_suffix(f".{ext}")
         filepath.write_bytes(image.blob)
-        return True
+        return filepath
     except Exception as e:
         print(f"  Warning: could not extract image: {e}")
-        return False
+        return None
 
 
-def extract_images_from_slide(slide, slide_index: int, images_dir: Path) -> list[str]:
+def extract_images_from_slide(slide, slide_index: int, images_dir: Path, rel_dir: str) -> list[str]:
     """
     Extract all Picture shapes from a slide and save them to images_dir.
     Also recurses into GroupShapes.
-    Returns list of relative paths like 'images/slide_01_img_01.png'.
+    Returns list of paths relative to the JSON, like 'images/lecture01/slide_01_img_01.png'
+    (rel_dir is images_dir relative to the JSON).
     """
     images_dir.mkdir(parents=True, exist_ok=True)
     image_paths = []
@@ -148,17 +168,10 @@ def extract_images_from_slide(slide, slide_index: int, images_dir: Path) -> list
             # Determine extension from image blob (may be updated in _save_picture)
             filename = f"slide_{slide_index:02d}_img_{img_counter:02d}.png"
             filepath = images_dir / filename
-            if _save_picture(shape, filepath):
-                # Use whichever extension _save_picture ended up writing
-                actual_file = next(
-                    (
-                        f
-                        for f in images_dir.iterdir()
-                        if f.stem == filepath.stem
-                    ),
-                    filepath,
-                )
-                image_paths.append(f"images/{actual_file.name}")
+            # _save_picture picks the extension from the image format
+            actual_file = _save_picture(shape, filepath)
+            if actual_file:
+                image_paths.append(f"{rel_dir}/{actual_file.name}")
         elif hasattr(shape, "shapes"):  # GroupShape — recurse
             for subshape in shape.shapes:
                 process_shape(subshape)
@@ -169,13 +182,90 @@ def extract_images_from_slide(slide, slide_index: int, images_dir: Path) -> list
     return image_paths
 
 
-def extract_pptx(input_path: str, output_path: str = None):
+# Formats pdflatex can \includegraphics directly
+LATEX_IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".pdf"}
+
+
+def normalize_images(json_path: str) -> int:
+    """
+    Convert extracted images pdflatex cannot include (gif, bmp, tiff, ...) to
+    PNG and rewrite their image_paths in the JSON. Returns the number converted.
+    Formats PyMuPDF cannot decode (e.g. wmf/emf) are left as-is with a warning.
+    """
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz
+
+    json_path = Path(json_path)
+    data = read_json(json_path)
+    base_dir = json_path.parent
+    converted = 0
+
+    for slide in data.get("slides", []):
+        new_paths = []
+        for rel in slide.get("image_paths", []):
+            src = base_dir / rel
+            if src.suffix.lower() in LATEX_IMAGE_EXTS:
+                new_paths.append(rel)
+                continue
+            dest = src.with_suffix(".png")
+            try:
+                pix = fitz.Pixmap(str(src))
+                if pix.colorspace is not None and pix.colorspace.n > 3:  # CMYK -> RGB for PNG
+                    pix = fitz.Pixmap(fitz.csRGB, pix)
+                pix.save(str(dest))
+                new_paths.append(str(Path(rel).with_suffix(".png").as_posix()))
+                converted += 1
+            except Exception as e:
+                print(f"  Warning: could not convert {rel} to PNG: {e}")
+                new_paths.append(rel)
+        slide["image_paths"] = new_paths
+
+    if converted:
+        write_json(data, json_path)
+        print(f"Normalized {converted} images to PNG -> {json_path}")
+    return converted
+
+
+def split_decorative(slides_data: list[dict], base_dir: Path, keep_decorative: bool = False) -> int:
+    """
+    Move recurring images from each slide's image_paths to decorative_images
+    (copy instead of move when keep_decorative). Returns the number found.
+    """
+    for s in slides_data:
+        s["decorative_images"] = []
+    try:
+        from image_hash import find_decorative
+    except ImportError:
+        # stderr: without an output path the JSON itself goes to stdout
+        print("  Warning: numpy not installed; decorative image detection skipped.",
+              file=sys.stderr)
+        return 0
+
+    decorative = find_decorative([s["image_paths"] for s in slides_data], base_dir)
+    for s in slides_data:
+        s["decorative_images"] = [p for p in s["image_paths"] if p in decorative]
+        if not keep_decorative:
+            s["image_paths"] = [p for p in s["image_paths"] if p not in decorative]
+    return len(decorative)
+
+
+def extract_pptx(input_path: str, output_path: str = None, print_json: bool = True,
+                 keep_decorative: bool = False):
+    """
+    Extract a PPTX to the JSON structure above and return it as a dict.
+
+    The JSON is written to output_path if given; otherwise it is printed
+    unless print_json is False (in-process callers such as course_helper.py).
+    """
     prs = Presentation(input_path)
     input_path = Path(input_path).resolve()
 
-    # images/ folder: next to output JSON, or next to the PPTX
+    # images/<deck>/ folder: next to output JSON, or next to the PPTX
     base_dir = Path(output_path).parent if output_path else input_path.parent
-    images_dir = base_dir / "images"
+    images_dir = base_dir / "images" / input_path.stem
+    rel_dir = f"images/{input_path.stem}"
 
     slides_data = []
 
@@ -183,7 +273,7 @@ def extract_pptx(input_path: str, output_path: str = None):
         slide_index = i + 1
 
         # Extract images for this slide
-        image_paths = extract_images_from_slide(slide, slide_index, images_dir)
+        image_paths = extract_images_from_slide(slide, slide_index, images_dir, rel_dir)
         has_images = bool(image_paths) or any(
             s.shape_type == 13 for s in slide.shapes
         )
@@ -217,6 +307,8 @@ def extract_pptx(input_path: str, output_path: str = None):
 
         slides_data.append(slide_info)
 
+    n_decorative = split_decorative(slides_data, base_dir, keep_decorative)
+
     result = {
         "source_file": str(input_path.name),
         "slide_count": len(slides_data),
@@ -225,23 +317,43 @@ def extract_pptx(input_path: str, output_path: str = None):
     }
 
     if output_path:
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        write_json(result, output_path)
         total_images = sum(len(s["image_paths"]) for s in slides_data)
         print(f"Extracted {len(slides_data)} slides -> {output_path}")
         if total_images:
             print(f"  Saved {total_images} images -> {images_dir}")
-    else:
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+        if n_decorative:
+            print(f"  {n_decorative} recurring decorative images listed under decorative_images")
+    elif print_json:
+        print(dumps(result).decode("utf-8"))
 
     return result
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python extract_content.py <input.pptx> [output.json]")
+        print("Usage: python extract_content.py <input.pptx> [output.json] [--keep-decorative]")
+        print("       python extract_content.py --batch <input.pptx|folder ...>")
+        print("       python extract_content.py --list <input.pptx|folder ...> [--json]")
         sys.exit(1)
 
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    extract_pptx(input_file, output_file)
+    if sys.argv[1] == "--list":
+        from inspect_pptx import list_decks
+        decks = [a for a in sys.argv[2:] if a != "--json"]
+        sys.exit(0 if list_decks(decks, as_json="--json" in sys.argv) else 1)
+
+    if sys.argv[1] == "--batch":
+        from job_spool import expand_inputs, run_batch
+
+        def _extract_one(pptx: str) -> str:
+            out = Path(pptx).with_name(f"{Path(pptx).stem}_content.json")
+            extract_pptx(pptx, str(out))
+            return str(out)
+
+        ok = run_batch("extract", expand_inputs(sys.argv[2:], ".pptx"), _extract_one)
+        sys.exit(0 if ok else 1)
+
+    cli_args = [a for a in sys.argv[1:] if a != "--keep-decorative"]
+    input_file = cli_args[0]
+    output_file = cli_args[1] if len(cli_args) > 1 else None
+    extract_pptx(input_file, output_file, keep_decorative="--keep-decorative" in sys.argv)
@@ -0,0 +1,135 @@
+"""
+CUHKsz Course Helper - Decorative Image Detection
+Finds logos, watermarks and background pictures that recur across a deck so
+extract_content.py can keep them out of each slide's image_paths.
+
+Every image is reduced to a 64-bit difference hash (dHash): decoded with
+PyMuPDF, converted to 9x8 grayscale, and each bit records whether a pixel is
+brighter than its right neighbour. Re-encoded or slightly rescaled copies of
+the same picture land within a few bits of each other. Flat images (solid
+fills, blank frames) all hash to zero, so the mean brightness must also
+agree within MEAN_TOLERANCE. Clustering is
+leader-based: the first unassigned image claims every unassigned image within
+MAX_HAMMING bits, computed for the whole deck at once with NumPy (XOR +
+popcount over packed bytes), so a deck costs one vector pass per distinct
+picture. A cluster that appears on more than DECORATIVE_FRACTION of the
+slides (and on at least MIN_DECORATIVE_SLIDES) is decorative.
+
+Usage:
+    python image_hash.py <content.json>     # report clusters for an extracted deck
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+
+HASH_SIZE = 8
+# Max differing bits (out of 64) for two images to count as the same picture
+MAX_HAMMING = 6
+# Max difference in mean gray level (0-255) for two images to be the same picture
+MEAN_TOLERANCE = 16
+DECORATIVE_FRACTION = 0.5
+MIN_DECORATIVE_SLIDES = 3
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _thumbnail(path: Path, fitz) -> np.ndarray | None:
+    """(8, 9) grayscale thumbnail, or None if the image cannot be decoded."""
+    try:
+        pix = fitz.Pixmap(str(path))
+        if pix.alpha:
+            pix = fitz.Pixmap(pix, 0)  # drop alpha
+        if pix.colorspace is None or pix.colorspace.n != 1:
+            pix = fitz.Pixmap(fitz.csGRAY, pix)
+        small = fitz.Pixmap(pix, HASH_SIZE + 1, HASH_SIZE)
+        arr = np.frombuffer(small.samples, dtype=np.uint8)
+        # Rows may be padded: use stride to reshape, then crop to width
+        return arr.reshape(small.height, small.stride)[:, :small.width].astype(np.int16)
+    except Exception:
+        return None
+
+
+def dhash_images(paths: list[Path]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return (hashes, means, ok): hashes is (N, 8) uint8 (64 packed bits per
+    image), means the mean gray level, ok marks images that could be decoded.
+    """
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz
+
+    thumbs = np.zeros((len(paths), HASH_SIZE, HASH_SIZE + 1), dtype=np.int16)
+    ok = np.zeros(len(paths), dtype=bool)
+    for i, p in enumerate(paths):
+        t = _thumbnail(p, fitz)
+        if t is not None and t.shape == thumbs.shape[1:]:
+            thumbs[i] = t
+            ok[i] = True
+    bits = thumbs[:, :, 1:] > thumbs[:, :, :-1]          # (N, 8, 8) bool, all images at once
+    means = thumbs.mean(axis=(1, 2))
+    return np.packbits(bits.reshape(len(paths), -1), axis=1), means, ok
+
+
+def cluster_hashes(hashes: np.ndarray, means: np.ndarray, ok: np.ndarray,
+                   max_distance: int = MAX_HAMMING) -> np.ndarray:
+    """
+    Group near-duplicates (Hamming distance <= max_distance and mean gray
+    within MEAN_TOLERANCE of the cluster's first image). Returns a cluster
+    label per image; undecodable images each keep a label of their own.
+    """
+    n = len(hashes)
+    labels = np.arange(n)
+    unassigned = ok.copy()
+    for i in range(n):
+        if not unassigned[i]:
+            continue
+        dist = _POPCOUNT[hashes ^ hashes[i]].sum(axis=1, dtype=np.uint16)
+        members = unassigned & (dist <= max_distance) & (np.abs(means - means[i]) <= MEAN_TOLERANCE)
+        labels[members] = i
+        unassigned[members] = False
+    return labels
+
+
+def find_decorative(slide_images: list[list[str]], base_dir: Path,
+                    fraction: float = DECORATIVE_FRACTION) -> set[str]:
+    """
+    slide_images: per slide, the relative image paths extracted from it.
+    Returns the relative paths that belong to a recurring (decorative) cluster.
+    """
+    flat = [(s, rel) for s, rels in enumerate(slide_images) for rel in rels]
+    if not flat:
+        return set()
+    hashes, means, ok = dhash_images([base_dir / rel for _, rel in flat])
+    labels = cluster_hashes(hashes, means, ok)
+
+    slides_per_cluster: dict[int, set[int]] = {}
+    for (s, _), label in zip(flat, labels):
+        slides_per_cluster.setdefault(int(label), set()).add(s)
+
+    n_slides = len(slide_images)
+    decorative_labels = {
+        label for label, slides in slides_per_cluster.items()
+        if len(slides) >= MIN_DECORATIVE_SLIDES and len(slides) > fraction * n_slides
+    }
+    return {rel for (_, rel), label in zip(flat, labels) if int(label) in decorative_labels}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python image_hash.py <content.json>")
+        sys.exit(1)
+
+    from slide_io import read_json
+
+    json_file = Path(sys.argv[1]).resolve()
+    deck = read_json(json_file)
+    per_slide = [s.get("image_paths", []) + s.get("decorative_images", []) for s in deck["slides"]]
+    found = find_decorative(per_slide, json_file.parent)
+    total = sum(len(p) for p in per_slide)
+    print(f"{len(found)} of {total} images are decorative")
+    for rel in sorted(found):
+        print(f"  {rel}")
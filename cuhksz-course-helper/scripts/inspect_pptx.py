@@ -0,0 +1,251 @@
+"""
+CUHKsz Course Helper - PPTX Inspector
+Triage for a folder of incoming decks: slide count, slide titles, which
+slides have speaker notes, and how many pictures and media files each deck
+holds, without running the full extraction (extract_content.py).
+
+Only the package parts needed are read, straight from the zip with an
+incremental XML parser (no python-pptx object model, no image decoding):
+presentation.xml for the slide order and size, each slide's relationships
+for picture / media / notes references, the slide XML up to the end of its
+title placeholder, and the notes slide up to the first note text. Media
+files are counted and sized from the zip directory. Decks are inspected in
+a process pool, so a folder of 100 decks takes about a second.
+
+Titles follow extract_content.py: the text of the placeholder with idx 0,
+paragraphs joined by newlines.
+
+Usage:
+    python inspect_pptx.py <input.pptx|folder ...> [--json] [--jobs N]
+    python extract_content.py --list <input.pptx|folder ...> [--json]   (same thing)
+
+--json prints one record per deck (with per-slide details) instead of the table.
+"""
+
+import os
+import posixpath
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+# Below this many decks, starting a process pool costs more than it saves
+POOL_MIN_DECKS = 16
+EMU_PER_INCH = 914400
+TITLE_COLUMN = 40             # characters of the first slide's title in the table
+
+_MEDIA_RELS = ("media", "video", "audio")
+
+
+def _local(tag: str) -> str:
+    """Tag or attribute name without its namespace (transitional or strict OOXML)."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _rel_id(el) -> str | None:
+    for key, value in el.attrib.items():
+        if _local(key) == "id" and key.startswith("{"):
+            return value
+    return None
+
+
+# ── Package parts ─────────────────────────────────────────────────────────────
+def _rels(zf: zipfile.ZipFile, part: str) -> dict[str, tuple[str, str | None]]:
+    """Relationships of a part: {rId: (type, target part or None if external)}."""
+    folder, name = posixpath.split(part)
+    rels_part = posixpath.join(folder, "_rels", f"{name}.rels")
+    rels = {}
+    try:
+        f = zf.open(rels_part)
+    except KeyError:
+        return rels
+    with f:
+        for _, el in ET.iterparse(f):
+            if _local(el.tag) == "Relationship":
+                kind = _local(el.get("Type", "").rsplit("/", 1)[-1])
+                target = el.get("Target", "")
+                if el.get("TargetMode") == "External":
+                    path = None
+                elif target.startswith("/"):
+                    path = target.lstrip("/")
+                else:
+                    path = posixpath.normpath(posixpath.join(folder, target))
+                rels[el.get("Id")] = (kind, path)
+            el.clear()
+    return rels
+
+
+def _main_part(zf: zipfile.ZipFile) -> str:
+    for kind, path in _rels(zf, "").values():
+        if kind == "officeDocument" and path:
+            return path
+    return "ppt/presentation.xml"
+
+
+def _slide_order(zf: zipfile.ZipFile, pres_part: str) -> tuple[list[str], tuple[int, int] | None]:
+    """Slide parts in presentation order, and the slide size in EMU."""
+    rel_ids, size = [], None
+    with zf.open(pres_part) as f:
+        for _, el in ET.iterparse(f):
+            name = _local(el.tag)
+            if name == "sldId":
+                rel_ids.append(_rel_id(el))
+            elif name == "sldSz":
+                size = (int(el.get("cx", 0)), int(el.get("cy", 0)))
+                break  # everything after sldSz (notes size, text styles) is not needed
+            elif name == "sldIdLst":
+                el.clear()
+    rels = _rels(zf, pres_part)
+    return [rels[r][1] for r in rel_ids if r in rels and rels[r][1]], size
+
+
+def slide_title(zf: zipfile.ZipFile, part: str) -> str:
+    """Text of the slide's title placeholder (idx 0); parsing stops right after it."""
+    depth, is_title, paras, runs = 0, False, [], []
+    with zf.open(part) as f:
+        for event, el in ET.iterparse(f, events=("start", "end")):
+            name = _local(el.tag)
+            if event == "start":
+                if name == "sp":
+                    depth += 1
+                    if depth == 1:
+                        is_title, paras, runs = False, [], []
+                elif name == "ph" and depth == 1:
+                    is_title = el.get("idx", "0") == "0"
+                continue
+            if depth == 1 and is_title:
+                if name == "t":
+                    runs.append(el.text or "")
+                elif name == "br":
+                    runs.append("\v")
+                elif name == "p":
+                    paras.append("".join(runs))
+                    runs = []
+            if name == "sp":
+                if depth == 1 and is_title:
+                    return "\n".join(paras).strip()
+                depth -= 1
+            el.clear()
+    return ""
+
+
+def has_notes(zf: zipfile.ZipFile, part: str) -> bool:
+    """True if the notes slide's body placeholder has any text."""
+    depth, in_body = 0, False
+    with zf.open(part) as f:
+        for event, el in ET.iterparse(f, events=("start", "end")):
+            name = _local(el.tag)
+            if event == "start":
+                if name == "sp":
+                    depth += 1
+                    in_body = False
+                elif name == "ph" and depth:
+                    in_body = el.get("type") == "body"
+                continue
+            if name == "t" and in_body and (el.text or "").strip():
+                return True
+            if name == "sp":
+                depth -= 1
+            el.clear()
+    return False
+
+
+# ── Decks ─────────────────────────────────────────────────────────────────────
+def inspect_pptx(pptx_path: str) -> dict:
+    """Metadata of one deck; {"source_file", "path", "error"} if it cannot be read."""
+    path = Path(pptx_path)
+    record = {"source_file": path.name, "path": str(path.resolve())}
+    try:
+        with zipfile.ZipFile(path) as zf:
+            slide_parts, size = _slide_order(zf, _main_part(zf))
+            slides = []
+            for i, part in enumerate(slide_parts, start=1):
+                rels = _rels(zf, part).values()
+                notes_part = next((p for kind, p in rels if kind == "notesSlide" and p), None)
+                slides.append({
+                    "index": i,
+                    "title": slide_title(zf, part),
+                    "has_notes": bool(notes_part) and has_notes(zf, notes_part),
+                    "images": sum(1 for kind, _ in rels if kind == "image"),
+                    "media": sum(1 for kind, _ in rels if kind in _MEDIA_RELS),
+                })
+            media = [info for info in zf.infolist()
+                     if info.filename.startswith("ppt/media/") and not info.is_dir()]
+    except (OSError, zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+        return {**record, "error": str(e) or type(e).__name__}
+
+    record.update({
+        "slide_count": len(slides),
+        "slide_size": [round(s / EMU_PER_INCH, 2) for s in size] if size else None,
+        "notes_slides": sum(s["has_notes"] for s in slides),
+        "image_refs": sum(s["images"] for s in slides),
+        "media_files": len(media),
+        "media_bytes": sum(info.file_size for info in media),
+        "slides": slides,
+    })
+    return record
+
+
+def inspect_many(paths: list[str], jobs: int | None = None) -> list[dict]:
+    """inspect_pptx for every path, in a process pool when there are many."""
+    workers = jobs or os.cpu_count() or 1
+    if len(paths) < POOL_MIN_DECKS or workers == 1:
+        return [inspect_pptx(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(inspect_pptx, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+
+def print_table(records: list[dict]):
+    print(f"  {'Slides':>6} {'Notes':>5} {'Images':>6} {'Media':>5} {'MB':>6}  {'File':<30} First title")
+    for r in records:
+        if "error" in r:
+            print(f"  {'-':>6} {'-':>5} {'-':>6} {'-':>5} {'-':>6}  {r['source_file']:<30} ERROR: {r['error']}")
+            continue
+        first = " ".join(r["slides"][0]["title"].split()) if r["slides"] else ""
+        if len(first) > TITLE_COLUMN:
+            first = first[:TITLE_COLUMN - 3] + "..."
+        print(f"  {r['slide_count']:>6} {r['notes_slides']:>5} {r['image_refs']:>6} {r['media_files']:>5} "
+              f"{r['media_bytes'] / (1024 * 1024):>6.1f}  {r['source_file']:<30} {first}")
+    ok = [r for r in records if "error" not in r]
+    print(f"\n{len(ok)} decks, {sum(r['slide_count'] for r in ok)} slides"
+          + (f", {len(records) - len(ok)} unreadable" if len(ok) < len(records) else ""))
+
+
+def list_decks(inputs: list[str], as_json: bool = False, jobs: int | None = None) -> bool:
+    """Inspect decks and folders of decks; print a table or JSON. False if any deck failed."""
+    from job_spool import expand_inputs
+    paths = expand_inputs(inputs, ".pptx")
+    if not paths:
+        print("ERROR: No .pptx files given.")
+        return False
+    records = inspect_many(paths, jobs)
+    if as_json:
+        from slide_io import dumps
+        print(dumps(records).decode("utf-8"))
+    else:
+        print_table(records)
+    return all("error" not in r for r in records)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python inspect_pptx.py <input.pptx|folder ...> [--json] [--jobs N]")
+        sys.exit(1)
+
+    args = sys.argv[1:]
+    files, json_out, n_jobs = [], False, None
+    i = 0
+    while i < len(args):
+        if args[i] == "--json":
+            json_out = True
+            i += 1
+        elif args[i] == "--jobs" and i + 1 < len(args):
+            n_jobs = int(args[i + 1])
+            i += 2
+        else:
+            files.append(args[i])
+            i += 1
+
+    sys.exit(0 if list_decks(files, json_out, n_jobs) else 1)
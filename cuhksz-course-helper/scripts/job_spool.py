@@ -0,0 +1,277 @@
+"""
+CUHKsz Course Helper - Resumable Batch Job Spool
+SQLite-backed checkpointing for the --batch modes of extract_content.py,
+compile_latex.py and convert_to_pdf.py.
+
+Every job is keyed by (kind, resolved input path, SHA-256 of the input
+file, parameters), so:
+  - a job that finished is never run again, even after a crash or restart
+  - a changed input file is a new job
+  - identical files in different folders are separate jobs
+  - jobs left "running" by a killed process are re-queued on the next start
+  - failures are retried with exponential backoff (MAX_ATTEMPTS per run);
+    starting the batch again gives failed jobs a fresh set of attempts
+
+Job states: queued -> running -> done | failed
+
+run_batch(..., post=f) splits a job in two: the handler runs in this
+process, then f(handler result) runs in a process pool while the next
+handler starts. The job is done only when both succeed; if f fails the
+whole job is retried, so a checkpointed job never skips its post step.
+
+Usage:
+    python job_spool.py [--status] [--clear-done] [--spool path.sqlite]
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "cuhksz-course-helper"
+DEFAULT_SPOOL = CACHE_DIR / "jobs.sqlite"
+
+MAX_ATTEMPTS = 3
+BACKOFF_BASE_S = 2.0
+BACKOFF_MAX_S = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key          TEXT PRIMARY KEY,
+    kind         TEXT NOT NULL,
+    input_path   TEXT NOT NULL,
+    params       TEXT NOT NULL,
+    state        TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    pid          INTEGER,
+    result       TEXT,
+    error        TEXT,
+    updated      REAL NOT NULL
+)
+"""
+
+
+def file_hash(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def expand_inputs(args: list[str], suffix: str) -> list[str]:
+    """Expand folders to their *suffix files; keep explicit files as given."""
+    files = []
+    for arg in args:
+        p = Path(arg)
+        if p.is_dir():
+            files += sorted(
+                str(f) for f in p.glob(f"*{suffix}")
+                if not f.name.startswith("~$")
+            )
+        else:
+            files.append(str(p))
+    return list(dict.fromkeys(files))
+
+
+def _pid_alive(pid: int | None) -> bool:
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True  # exists but not ours / cannot tell on this platform
+    return True
+
+
+class JobSpool:
+    def __init__(self, path: str | Path | None = None):
+        path = Path(path) if path else DEFAULT_SPOOL
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(_SCHEMA)
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_kind_state ON jobs(kind, state)")
+
+    def close(self):
+        self.db.close()
+
+    def recover(self):
+        """Re-queue jobs whose owning process died while they were running."""
+        rows = self.db.execute("SELECT key, pid FROM jobs WHERE state = 'running'").fetchall()
+        for key, pid in rows:
+            if not _pid_alive(pid):
+                self.db.execute(
+                    "UPDATE jobs SET state = 'queued', pid = NULL, updated = ? "
+                    "WHERE key = ? AND state = 'running'", (time.time(), key))
+
+    def enqueue(self, kind: str, input_path: str, params: dict | None = None) -> str:
+        """Add a job (idempotent) and return its key. Failed jobs get fresh attempts."""
+        params_json = json.dumps(params or {}, sort_keys=True)
+        # The path says which job it is; the content hash says whether it changed
+        resolved = str(Path(input_path).resolve())
+        key = hashlib.sha256(
+            f"{kind}\0{resolved}\0{file_hash(input_path)}\0{params_json}".encode()
+        ).hexdigest()
+        now = time.time()
+        self.db.execute(
+            "INSERT INTO jobs (key, kind, input_path, params, state, updated) "
+            "VALUES (?, ?, ?, ?, 'queued', ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "  input_path = excluded.input_path, "
+            "  state = CASE WHEN state = 'failed' THEN 'queued' ELSE state END, "
+            "  attempts = CASE WHEN state = 'failed' THEN 0 ELSE attempts END, "
+            "  next_attempt = CASE WHEN state = 'failed' THEN 0 ELSE next_attempt END, "
+            "  updated = excluded.updated",
+            (key, kind, str(input_path), params_json, now),
+        )
+        return key
+
+    def state(self, key: str) -> tuple:
+        return self.db.execute(
+            "SELECT state, attempts, next_attempt, input_path, result, error FROM jobs WHERE key = ?",
+            (key,),
+        ).fetchone()
+
+    def claim(self, key: str) -> bool:
+        """Atomically move a due job to running; False if someone else has it or it is done."""
+        cur = self.db.execute(
+            "UPDATE jobs SET state = 'running', pid = ?, attempts = attempts + 1, updated = ? "
+            "WHERE key = ? AND state = 'queued' AND next_attempt <= ?",
+            (os.getpid(), time.time(), key, time.time()),
+        )
+        return cur.rowcount == 1
+
+    def finish(self, key: str, result: str | None):
+        self.db.execute(
+            "UPDATE jobs SET state = 'done', pid = NULL, result = ?, error = NULL, updated = ? "
+            "WHERE key = ?", (result, time.time(), key))
+
+    def fail(self, key: str, error: str, attempts: int):
+        """Record a failure; re-queue with backoff while attempts remain."""
+        if attempts < MAX_ATTEMPTS:
+            delay = min(BACKOFF_BASE_S * 2 ** (attempts - 1), BACKOFF_MAX_S)
+            self.db.execute(
+                "UPDATE jobs SET state = 'queued', pid = NULL, error = ?, next_attempt = ?, "
+                "updated = ? WHERE key = ?", (error, time.time() + delay, time.time(), key))
+        else:
+            self.db.execute(
+                "UPDATE jobs SET state = 'failed', pid = NULL, error = ?, updated = ? "
+                "WHERE key = ?", (error, time.time(), key))
+
+    def counts(self) -> list[tuple]:
+        return self.db.execute(
+            "SELECT kind, state, COUNT(*) FROM jobs GROUP BY kind, state ORDER BY kind, state"
+        ).fetchall()
+
+
+def run_batch(kind: str, inputs: list[str], handler, params: dict | None = None,
+              spool_path: str | Path | None = None, post=None,
+              jobs: int | None = None) -> bool:
+    """
+    Run handler(input_path) for every input through the spool. The handler
+    returns a truthy result (e.g. the output path) on success. If post is
+    given (a picklable top-level function), post(result) then runs in a pool
+    of `jobs` processes (default: one per CPU core) and must also return a
+    truthy value. Returns True if every job ends up done.
+    """
+    spool = JobSpool(spool_path)
+    pool = ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) if post else None
+    inflight = {}  # post future -> (key, attempts, handler result)
+
+    def settle(futures):
+        for fut in futures:
+            key, attempts, result = inflight.pop(fut)
+            try:
+                error = None if fut.result() else "post-processing reported failure"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            if error:
+                spool.fail(key, error, attempts)
+            else:
+                spool.finish(key, str(result))
+
+    try:
+        spool.recover()
+        keys = {}
+        for path in inputs:
+            if not Path(path).exists():
+                print(f"  Skipping missing input: {path}")
+                continue
+            keys[spool.enqueue(kind, path, params)] = path
+
+        skipped = sum(1 for k in keys if spool.state(k)[0] == "done")
+        if skipped:
+            print(f"Resuming: {skipped}/{len(keys)} {kind} jobs already done")
+
+        while True:
+            settle([f for f in inflight if f.done()])
+            pending = [k for k in keys if spool.state(k)[0] in ("queued", "running")]
+            if not pending:
+                break
+            progressed = False
+            for key in pending:
+                if not spool.claim(key):
+                    continue
+                progressed = True
+                _, attempts, _, path, _, _ = spool.state(key)
+                print(f"[{kind}] {path} (attempt {attempts}/{MAX_ATTEMPTS})")
+                try:
+                    result = handler(path)
+                    error = None if result else "handler reported failure"
+                except Exception as e:
+                    result, error = None, f"{type(e).__name__}: {e}"
+                if error:
+                    spool.fail(key, error, attempts)
+                elif pool:
+                    inflight[pool.submit(post, result)] = (key, attempts, result)
+                else:
+                    spool.finish(key, str(result))
+            if not progressed:
+                # Everything left is post-processing, backing off, or owned by
+                # another live process
+                due = [spool.state(k)[2] for k in pending if spool.state(k)[0] == "queued"]
+                delay = max(0.1, min(due) - time.time()) if due else 0.1
+                if inflight:
+                    settle(wait(inflight, timeout=delay, return_when=FIRST_COMPLETED).done)
+                else:
+                    time.sleep(delay)
+
+        failed = [(keys[k], spool.state(k)[5]) for k in keys if spool.state(k)[0] == "failed"]
+        done = len(keys) - len(failed)
+        print(f"\nBatch {kind}: {done} done ({skipped} from checkpoint), {len(failed)} failed")
+        for path, error in failed:
+            print(f"  FAILED {path}: {error}")
+        return not failed
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+        spool.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    spool_file = None
+    if "--spool" in args:
+        i = args.index("--spool")
+        spool_file = args[i + 1] if i + 1 < len(args) else None
+    spool = JobSpool(spool_file)
+    if "--clear-done" in args:
+        n = spool.db.execute("DELETE FROM jobs WHERE state = 'done'").rowcount
+        print(f"Removed {n} finished jobs.")
+    rows = spool.counts()
+    if not rows:
+        print("Spool is empty.")
+    for kind, state, n in rows:
+        print(f"  {kind:<10} {state:<8} {n}")
+    spool.close()
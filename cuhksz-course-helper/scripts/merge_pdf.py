@@ -0,0 +1,326 @@
+"""
+CUHKsz Course Helper - Course Pack Merger
+Merges the PDFs of a course (lectures, tutorials, _answers files, from
+compile_latex.py / convert_to_pdf.py) into one course pack with bookmarks.
+
+Memory stays bounded on packs of thousands of pages: the documents are
+appended one at a time to a work file on disk, which is saved incrementally
+and closed after each document, so only the document being appended is held
+in memory.
+
+Images, fonts and other shared resources (the university logo, the template
+fonts) are stored once: each appended object is hashed together with its
+stream, references to an object already in the pack are redirected to the
+existing copy, and the duplicate is dropped when the pack is written out.
+
+The outline has one entry per document (under its [group] if the manifest
+has groups). Below it come the document's own bookmarks (beamer sections)
+and one entry per frame, taken from the largest text at the top of each
+page; overlays and "(cont.)" slides repeating the previous title are
+collapsed into one entry.
+
+Manifest (one document per line, in order; paths relative to the manifest):
+
+    # comments and blank lines are ignored
+    [Lectures]                          <- starts an outline group
+    lecture01.pdf
+    lecture02.tex | Lecture 2: Limits   <- optional outline title
+    [Tutorials]
+    tutorial01.pptx
+
+A .tex or .pptx entry stands for the PDF next to it with the same name, i.e.
+the default output of compile_latex.py / convert_to_pdf.py.
+
+Usage:
+    python merge_pdf.py <manifest.txt | file.pdf ...> [--out pack.pdf] [--title T]
+                        [--linearize] [--no-frame-titles]
+
+--linearize writes a linearized ("fast web view") PDF; as in optimize_pdf.py,
+qpdf is used when PyMuPDF cannot linearize.
+"""
+
+import hashlib
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+
+# Top part of a page searched for the frame title, as a fraction of its height
+TITLE_ZONE = 0.25
+MAX_TITLE_LEN = 120
+
+_REF = re.compile(r"\b(\d+) 0 R\b")
+# Objects that belong to one place in the page tree and are never shared
+# (annotations are recognised by their /Rect)
+_UNSHAREABLE = re.compile(r"/Type\s*/(Page|Pages|Annot|Catalog|Outlines)\b|/Rect\s*\[")
+_CONT = re.compile(r"\s*\(cont\.\)$")
+
+
+@dataclass
+class MergeItem:
+    path: Path
+    title: str | None = None   # outline title; default: PDF title or file name
+    group: str | None = None   # top-level outline group ([section] in the manifest)
+
+
+def _fitz():
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz
+    return fitz
+
+
+# ── Manifest ──────────────────────────────────────────────────────────────────
+def _as_pdf(path: Path) -> Path:
+    return path.with_suffix(".pdf") if path.suffix.lower() in (".tex", ".pptx") else path
+
+
+def read_manifest(manifest: str) -> list[MergeItem]:
+    """Parse a manifest file (see module docstring) into MergeItems."""
+    base = Path(manifest).resolve().parent
+    items, group = [], None
+    for line in Path(manifest).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            group = line[1:-1].strip() or None
+            continue
+        path, _, title = line.partition(" | ")
+        items.append(MergeItem(_as_pdf(base / path.strip()), title.strip() or None, group))
+    return items
+
+
+# ── Outline ───────────────────────────────────────────────────────────────────
+def frame_title(page) -> str:
+    """Largest text in the top TITLE_ZONE of the page ("" if none)."""
+    r = page.rect
+    zone = type(r)(r.x0, r.y0, r.x1, r.y0 + r.height * TITLE_ZONE)
+    lines = []
+    # flags=0: text only (the default also decodes the images on the page)
+    for block in page.get_text("dict", clip=zone, flags=0)["blocks"]:
+        for line in block.get("lines", []):
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if text:
+                lines.append((max(span["size"] for span in line["spans"]), text))
+    if not lines:
+        return ""
+    top = max(size for size, _ in lines)
+    title = " ".join(text for size, text in lines if size >= top - 0.5)
+    return title[:MAX_TITLE_LEN]
+
+
+def document_outline(src, level: int, offset: int, frame_titles: bool = True) -> list[list]:
+    """
+    Outline entries [level, title, page] (1-based pack page) for one document
+    appended at page `offset`: its own bookmarks, then its frames nested under
+    the bookmark they fall in.
+    """
+    own = {}
+    for lvl, title, page in src.get_toc(simple=True):
+        own.setdefault(max(page, 1), []).append((lvl, title))
+
+    entries, depth, previous = [], level, None
+    for pno in range(src.page_count):
+        page_own = own.get(pno + 1, [])
+        for lvl, title in page_own:
+            entries.append([level + lvl, title, offset + pno + 1])
+            depth = level + lvl
+        if not frame_titles:
+            continue
+        title = frame_title(src[pno])
+        base = _CONT.sub("", title)
+        if not base or base == previous:
+            continue
+        previous = base
+        if all(base != t for _, t in page_own):
+            entries.append([depth + 1, base, offset + pno + 1])
+    return entries
+
+
+# ── Shared objects ────────────────────────────────────────────────────────────
+def dedupe_objects(doc, start: int, seen: dict[bytes, int], skip: set[int]) -> int:
+    """
+    Redirect references to objects xref >= start that duplicate an object
+    already in `seen` (hash -> xref), and record the new unique ones there.
+    Pages, annotations and objects in `skip` (page contents) are never
+    shared. Returns the number of duplicates; they become unreferenced and
+    are dropped on a garbage save.
+    """
+    defs = {}
+    for xref in range(start, doc.xref_length()):
+        try:
+            defs[xref] = doc.xref_object(xref, compressed=True)
+        except Exception:
+            continue
+    pending = {x for x, text in defs.items() if x not in skip and not _UNSHAREABLE.search(text)}
+    streams = {x for x in pending if doc.xref_is_stream(x)}
+
+    dup: dict[int, int] = {}
+
+    def redirect(text: str) -> str:
+        return _REF.sub(lambda m: f"{dup.get(int(m.group(1)), int(m.group(1)))} 0 R", text)
+
+    # Objects are keyed after the objects they reference, so an image whose
+    # colour space is a duplicate (or a font whose font file is) is one too
+    while pending:
+        ready = [x for x in sorted(pending)
+                 if not any(int(r) in pending and int(r) != x for r in _REF.findall(defs[x]))]
+        if not ready:
+            break  # reference cycle: leave the rest unshared
+        for x in ready:
+            h = hashlib.sha256(redirect(defs[x]).encode())
+            if x in streams:
+                h.update(doc.xref_stream_raw(x) or b"")
+            key = h.digest()
+            if key in seen:
+                dup[x] = seen[key]
+            else:
+                seen[key] = x
+            pending.discard(x)
+
+    if dup:
+        for x, text in defs.items():
+            if x not in dup:
+                new = redirect(text)
+                if new != text:
+                    doc.update_object(x, new)
+    return len(dup)
+
+
+# ── Merge ─────────────────────────────────────────────────────────────────────
+def merge_pdfs(items: list[MergeItem], output_path: str, title: str | None = None,
+               linearize: bool = False, frame_titles: bool = True) -> dict | None:
+    """
+    Append items in order into output_path with a nested outline.
+    Returns {"path", "documents", "pages", "deduplicated", "linearized"} or None on failure.
+    """
+    try:
+        fitz = _fitz()
+    except ImportError:
+        print("ERROR: PyMuPDF not installed. Run: pip install pymupdf")
+        return None
+    if not items:
+        print("ERROR: Nothing to merge.")
+        return None
+    for item in items:
+        if not item.path.exists():
+            print(f"ERROR: File not found: {item.path}")
+            return None
+
+    dest = Path(output_path).resolve()
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    work = dest.with_name(f".{dest.stem}.merge.pdf")
+    tmp = dest.with_name(f".{dest.stem}.out.pdf")
+    tmp_lin = dest.with_name(f".{dest.stem}.lin.pdf")
+    grouped = any(item.group for item in items)
+    seen: dict[bytes, int] = {}
+    toc, pages, deduped, group = [], 0, 0, None
+
+    try:
+        for i, item in enumerate(items):
+            doc = fitz.open() if i == 0 else fitz.open(str(work))
+            start = doc.xref_length()
+            with fitz.open(str(item.path)) as src:
+                doc.insert_pdf(src)
+                if grouped and item.group != group:
+                    group = item.group
+                    toc.append([1, group or "Other", pages + 1])
+                level = 2 if grouped else 1
+                name = item.title or src.metadata.get("title") or item.path.stem
+                toc.append([level, name, pages + 1])
+                toc += document_outline(src, level, pages, frame_titles)
+            contents = {x for pno in range(pages, doc.page_count) for x in doc[pno].get_contents()}
+            deduped += dedupe_objects(doc, start, seen, contents)
+            pages = doc.page_count
+            # Object numbers must stay stable for `seen`: no garbage collection here
+            if i == 0:
+                doc.save(str(work))
+            else:
+                doc.saveIncr()
+            doc.close()
+            print(f"  + {item.path.name} ({pages} pages)")
+
+        doc = fitz.open(str(work))
+        doc.set_toc(toc)
+        doc.set_metadata({**doc.metadata, "title": title or dest.stem,
+                          "creationDate": "", "modDate": ""})
+        # garbage=2 drops the duplicates; no_new_id keeps the output reproducible
+        save_opts = dict(garbage=2, deflate=True, no_new_id=True)
+        linearized = False
+        if linearize:
+            try:
+                doc.save(str(tmp), linear=True, **save_opts)
+                linearized = True
+            except Exception:
+                pass  # MuPDF >= 1.26 dropped linearization; fall back to qpdf below
+        if not linearized:
+            doc.save(str(tmp), use_objstms=True, **save_opts)
+        doc.close()
+
+        if linearize and not linearized:
+            from optimize_pdf import linearize_with_qpdf
+            if linearize_with_qpdf(tmp, tmp_lin):
+                tmp_lin.replace(tmp)
+                linearized = True
+        tmp.replace(dest)
+    except Exception as e:
+        print(f"ERROR: could not merge into {dest.name}: {e}")
+        return None
+    finally:
+        for p in (work, tmp, tmp_lin):
+            p.unlink(missing_ok=True)
+
+    size = dest.stat().st_size / (1024 * 1024)
+    note = "" if linearized or not linearize else " (not linearized: install qpdf)"
+    print(f"Done: {dest} ({len(items)} documents, {pages} pages, {size:.1f} MB, "
+          f"{deduped} shared objects stored once){note}")
+    return {"path": str(dest), "documents": len(items), "pages": pages,
+            "deduplicated": deduped, "linearized": linearized}
+
+
+def merge_manifest(inputs: list[str], output_path: str | None = None, title: str | None = None,
+                   linearize: bool = False, frame_titles: bool = True) -> dict | None:
+    """Merge a manifest file, or a list of PDFs in the given order."""
+    if len(inputs) == 1 and Path(inputs[0]).suffix.lower() != ".pdf":
+        if not Path(inputs[0]).exists():
+            print(f"ERROR: File not found: {inputs[0]}")
+            return None
+        items = read_manifest(inputs[0])
+        default_out = Path(inputs[0]).with_suffix(".pdf")
+    else:
+        items = [MergeItem(_as_pdf(Path(p).resolve())) for p in inputs]
+        default_out = Path("course_pack.pdf")
+    return merge_pdfs(items, output_path or str(default_out), title, linearize, frame_titles)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python merge_pdf.py <manifest.txt | file.pdf ...> [--out pack.pdf] [--title T] "
+              "[--linearize] [--no-frame-titles]")
+        sys.exit(1)
+
+    args = sys.argv[1:]
+    files, out_arg, pack_title, lin, frames = [], None, None, False, True
+    i = 0
+    while i < len(args):
+        if args[i] == "--out" and i + 1 < len(args):
+            out_arg = args[i + 1]
+            i += 2
+        elif args[i] == "--title" and i + 1 < len(args):
+            pack_title = args[i + 1]
+            i += 2
+        elif args[i] == "--linearize":
+            lin = True
+            i += 1
+        elif args[i] == "--no-frame-titles":
+            frames = False
+            i += 1
+        else:
+            files.append(args[i])
+            i += 1
+
+    result = merge_manifest(files, out_arg, pack_title, lin, frames)
+    sys.exit(0 if result else 1)
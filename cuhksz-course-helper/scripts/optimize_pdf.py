@@ -0,0 +1,174 @@
+"""
+CUHKsz Course Helper - PDF Optimizer
+Shrinks PDFs from compile_latex.py / convert_to_pdf.py before distribution.
+
+Steps (PyMuPDF):
+  1. recompress images above DPI_THRESHOLD down to --dpi at JPEG --quality
+  2. subset embedded fonts to the glyphs actually used
+  3. save with garbage collection level 4: unused objects are dropped and
+     identical streams (the same logo image on every page) are merged
+  4. linearize for fast first-page display ("fast web view")
+
+MuPDF 1.26+ no longer writes linearized files; in that case qpdf is used
+for the last step if it is on PATH, otherwise the file is left
+non-linearized (and the report says so).
+
+The result replaces the input only if it is smaller.
+
+Usage:
+    python optimize_pdf.py <file.pdf|folder ...> [--quality Q] [--dpi D] [--jobs N] [--no-linearize]
+"""
+
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+DEFAULT_QUALITY = 75
+DEFAULT_DPI = 150
+# Only images rendered above this resolution are recompressed
+DPI_THRESHOLD = 200
+QPDF_TIMEOUT_S = 120
+
+
+def _fmt_size(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB" if n >= 1024 * 1024 else f"{n / 1024:.0f} KB"
+
+
+def linearize_with_qpdf(src: Path, dest: Path) -> bool:
+    qpdf = shutil.which("qpdf")
+    if not qpdf:
+        return False
+    from proc_runner import run
+    r = run([qpdf, "--linearize", str(src), str(dest)], timeout=QPDF_TIMEOUT_S)
+    # qpdf exits 3 for "succeeded with warnings"
+    return r.returncode in (0, 3) and not r.timed_out and dest.exists()
+
+
+def optimize_pdf(pdf_path: str, output_path: str = None, quality: int = DEFAULT_QUALITY,
+                 dpi: int = DEFAULT_DPI, linearize: bool = True) -> dict | None:
+    """
+    Optimize pdf_path (in place unless output_path is given).
+    Returns {"path", "before", "after", "linearized"} or None on failure.
+    """
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        try:
+            import fitz
+        except ImportError:
+            print("ERROR: PyMuPDF not installed. Run: pip install pymupdf")
+            return None
+
+    src = Path(pdf_path).resolve()
+    dest = Path(output_path).resolve() if output_path else src
+    if not src.exists():
+        print(f"ERROR: File not found: {src}")
+        return None
+    before = src.stat().st_size
+    tmp = dest.with_name(f".{dest.stem}.opt.pdf")
+    tmp_lin = dest.with_name(f".{dest.stem}.lin.pdf")
+
+    try:
+        doc = fitz.open(str(src))
+        if hasattr(doc, "rewrite_images"):  # PyMuPDF >= 1.24.11
+            doc.rewrite_images(dpi_threshold=DPI_THRESHOLD, dpi_target=dpi, quality=quality)
+        try:
+            doc.subset_fonts()
+        except Exception as e:  # fonts without usable glyph data are left untouched
+            print(f"  Warning: font subsetting skipped for {src.name}: {e}")
+
+        # no_new_id: keep output byte-reproducible (see compile_latex.py)
+        save_opts = dict(garbage=4, deflate=True, deflate_images=True, deflate_fonts=True,
+                         no_new_id=True)
+        linearized = False
+        if linearize:
+            try:
+                doc.save(str(tmp), linear=True, **save_opts)
+                linearized = True
+            except Exception:
+                pass  # MuPDF >= 1.26 dropped linearization; fall back to qpdf below
+        if not linearized:
+            doc.save(str(tmp), use_objstms=True, **save_opts)
+        doc.close()
+
+        if linearize and not linearized and linearize_with_qpdf(tmp, tmp_lin):
+            tmp_lin.replace(tmp)
+            linearized = True
+
+        after = tmp.stat().st_size
+        if after < before:
+            tmp.replace(dest)
+        else:
+            after = before  # optimization did not help; keep the original bytes
+            if dest != src:
+                shutil.copy2(src, dest)
+    except Exception as e:
+        print(f"ERROR: could not optimize {src.name}: {e}")
+        return None
+    finally:
+        tmp.unlink(missing_ok=True)
+        tmp_lin.unlink(missing_ok=True)
+
+    saved = 100 * (before - after) / before if before else 0
+    note = "" if linearized or not linearize else " (not linearized: install qpdf)"
+    print(f"Optimized: {dest.name} {_fmt_size(before)} -> {_fmt_size(after)} (-{saved:.0f}%){note}")
+    return {"path": str(dest), "before": before, "after": after, "linearized": linearized}
+
+
+def _optimize_one(args: tuple) -> dict | None:
+    path, quality, dpi, linearize = args
+    return optimize_pdf(path, quality=quality, dpi=dpi, linearize=linearize)
+
+
+def optimize_pdfs(paths: list[str], jobs: int | None = None, quality: int = DEFAULT_QUALITY,
+                  dpi: int = DEFAULT_DPI, linearize: bool = True) -> list[dict | None]:
+    """Optimize many PDFs in a process pool and print the total saving."""
+    if not paths:
+        return []
+    work = [(p, quality, dpi, linearize) for p in paths]
+    if len(work) == 1 or jobs == 1:
+        results = [_optimize_one(w) for w in work]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            results = list(pool.map(_optimize_one, work))
+
+    ok = [r for r in results if r]
+    if len(paths) > 1 and ok:
+        before = sum(r["before"] for r in ok)
+        after = sum(r["after"] for r in ok)
+        print(f"\nTotal: {len(ok)}/{len(paths)} files, {_fmt_size(before)} -> {_fmt_size(after)}")
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python optimize_pdf.py <file.pdf|folder ...> "
+              "[--quality Q] [--dpi D] [--jobs N] [--no-linearize]")
+        sys.exit(1)
+
+    args = sys.argv[1:]
+    files, q, d, n_jobs, lin = [], DEFAULT_QUALITY, DEFAULT_DPI, None, True
+    i = 0
+    while i < len(args):
+        if args[i] == "--quality" and i + 1 < len(args):
+            q = int(args[i + 1])
+            i += 2
+        elif args[i] == "--dpi" and i + 1 < len(args):
+            d = int(args[i + 1])
+            i += 2
+        elif args[i] == "--jobs" and i + 1 < len(args):
+            n_jobs = int(args[i + 1])
+            i += 2
+        elif args[i] == "--no-linearize":
+            lin = False
+            i += 1
+        else:
+            p = Path(args[i])
+            files += sorted(str(f) for f in p.glob("*.pdf")) if p.is_dir() else [str(p)]
+            i += 1
+
+    results = optimize_pdfs(files, n_jobs, q, d, lin)
+    sys.exit(0 if results and all(results) else 1)
@@ -0,0 +1,358 @@
+"""
+CUHKsz Course Helper - Pipeline Orchestrator
+Rebuilds a folder (or list) of decks as a task DAG instead of a chain of
+manual script runs.
+
+Per deck  <name>.pptx  the graph is:
+
+    extract  <name>.pptx        -> <name>_content.json  (+ images/<name>/)
+    images   <name>_content.json -> .<name>.images       (non-LaTeX images -> PNG)
+    compile  <name>*.tex + images -> <name>*.pdf          (one task per .tex)
+    render   <name>_content.json -> <name>_updated.pptx  (--template, only if no .tex)
+    convert  <name>_updated.pptx -> <name>_updated.pdf
+
+Stand-alone .tex files (e.g. answer documents) get a compile task of their own.
+
+Ready tasks run concurrently in a process pool, bounded by --jobs and by a
+memory budget (each task kind has an estimated peak; see TASK_MEMORY_MB).
+A task is skipped when all of its outputs are newer than all of its inputs
+and none of its dependencies ran in this pass. Each deck's images go to
+its own images/<name>/ folder, so decks in one folder build independently.
+
+--watch keeps running and, on every change to a .pptx or .tex (inotify on
+Linux, mtime polling elsewhere), re-plans the graph; only tasks downstream
+of the changed file are stale, so only those rebuild.
+
+Usage:
+    python pipeline.py <folder|file ...> [--template math|cs|stats] [--jobs N]
+                       [--mem-mb MB] [--watch]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+# Rough peak resident memory per task kind, used for admission control
+TASK_MEMORY_MB = {
+    "extract": 300,
+    "images": 200,
+    "render": 250,
+    "compile": 500,
+    "convert": 800,
+}
+WATCH_SUFFIXES = {".pptx", ".tex"}
+WATCH_DEBOUNCE_S = 0.5
+
+
+@dataclass
+class Task:
+    name: str                      # e.g. "compile:lecture1_updated.tex"
+    kind: str                      # key of TASK_MEMORY_MB
+    inputs: list[Path]
+    outputs: list[Path]
+    params: dict
+    deps: list[str] = field(default_factory=list)
+
+    def is_fresh(self) -> bool:
+        """True if every output exists and is newer than every input."""
+        try:
+            newest_in = max((p.stat().st_mtime_ns for p in self.inputs if p.exists()), default=0)
+            oldest_out = min(p.stat().st_mtime_ns for p in self.outputs)
+        except (OSError, ValueError):
+            return False
+        return oldest_out >= newest_in
+
+
+# ── Task bodies (run in worker processes) ─────────────────────────────────────
+def _run_task(kind: str, params: dict) -> bool:
+    if kind == "extract":
+        from extract_content import extract_pptx
+        return extract_pptx(params["pptx"], params["json"]) is not None
+    if kind == "images":
+        from extract_content import normalize_images
+        normalize_images(params["json"])
+        Path(params["stamp"]).touch()
+        return True
+    if kind == "compile":
+        from compile_latex import compile_tex
+        return compile_tex(params["tex"]) is not None
+    if kind == "render":
+        from build_pptx import build_pptx
+        return build_pptx(params["json"], params["pptx"], template_name=params["template"]) is not None
+    if kind == "convert":
+        from convert_to_pdf import convert_pptx_to_pdf
+        return convert_pptx_to_pdf(params["pptx"], params["pdf"]) is not None
+    raise ValueError(f"unknown task kind: {kind}")
+
+
+# ── Planning ──────────────────────────────────────────────────────────────────
+def _is_generated_pptx(path: Path) -> bool:
+    return path.stem.endswith(("_updated", "_enhanced", "_answers"))
+
+
+def plan(sources: list[Path], template: str | None = None) -> dict[str, Task]:
+    """Build the task graph for the given decks / folders."""
+    pptx_files, tex_files = [], []
+    for src in sources:
+        src = src.resolve()
+        if src.is_dir():
+            pptx_files += sorted(p for p in src.glob("*.pptx") if not p.name.startswith("~$"))
+            tex_files += sorted(src.glob("*.tex"))
+        elif src.suffix.lower() == ".pptx":
+            pptx_files.append(src)
+            tex_files += sorted(src.parent.glob(f"{src.stem}*.tex"))
+        elif src.suffix.lower() == ".tex":
+            tex_files.append(src)
+    pptx_files = [p for p in dict.fromkeys(pptx_files) if not _is_generated_pptx(p)]
+    tex_files = list(dict.fromkeys(tex_files))
+
+    tasks: dict[str, Task] = {}
+
+    def add(task: Task):
+        tasks[task.name] = task
+
+    claimed_tex = set()
+    for pptx in pptx_files:
+        stem, folder = pptx.stem, pptx.parent
+        json_path = folder / f"{stem}_content.json"
+        stamp = folder / f".{stem}.images"
+        add(Task(f"extract:{pptx.name}", "extract", [pptx], [json_path],
+                 {"pptx": str(pptx), "json": str(json_path)}))
+        add(Task(f"images:{pptx.name}", "images", [json_path], [stamp],
+                 {"json": str(json_path), "stamp": str(stamp)},
+                 deps=[f"extract:{pptx.name}"]))
+
+        deck_tex = [t for t in tex_files
+                    if t.parent == folder and (t.stem == stem or t.stem.startswith(stem + "_"))]
+        for tex in deck_tex:
+            claimed_tex.add(tex)
+            add(Task(f"compile:{tex.name}", "compile", [tex, stamp], [tex.with_suffix(".pdf")],
+                     {"tex": str(tex)}, deps=[f"images:{pptx.name}"]))
+
+        if template and not deck_tex:
+            out_pptx = folder / f"{stem}_updated.pptx"
+            out_pdf = out_pptx.with_suffix(".pdf")
+            add(Task(f"render:{pptx.name}", "render", [json_path, stamp], [out_pptx],
+                     {"json": str(json_path), "pptx": str(out_pptx), "template": template},
+                     deps=[f"images:{pptx.name}"]))
+            add(Task(f"convert:{out_pptx.name}", "convert", [out_pptx], [out_pdf],
+                     {"pptx": str(out_pptx), "pdf": str(out_pdf)},
+                     deps=[f"render:{pptx.name}"]))
+
+    for tex in tex_files:
+        if tex not in claimed_tex:
+            add(Task(f"compile:{tex.name}", "compile", [tex], [tex.with_suffix(".pdf")],
+                     {"tex": str(tex)}))
+    return tasks
+
+
+# ── Scheduling ────────────────────────────────────────────────────────────────
+def _memory_budget_mb() -> int:
+    """Three quarters of currently available memory (falls back to 4 GB)."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024 * 3 // 4
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES") // (1024 * 1024) * 3 // 4
+    except (ValueError, OSError, AttributeError):
+        return 4096
+
+
+def execute(tasks: dict[str, Task], jobs: int | None = None, mem_mb: int | None = None) -> bool:
+    """Run the graph; returns True if no task failed."""
+    jobs = jobs or os.cpu_count() or 1
+    mem_mb = mem_mb or _memory_budget_mb()
+    state: dict[str, str] = {}          # name -> "ran" | "fresh" | "failed" | "blocked"
+    pending = dict(tasks)
+    running = {}                        # future -> Task
+    mem_in_use = 0
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name, task in list(pending.items()):
+                dep_states = [state.get(d) for d in task.deps if d in tasks]
+                if any(s in ("failed", "blocked") for s in dep_states):
+                    state[name] = "blocked"
+                    del pending[name]
+                    print(f"  blocked  {name}")
+                    continue
+                if any(s is None for s in dep_states):
+                    continue  # dependency not finished yet
+                if "ran" not in dep_states and task.is_fresh():
+                    state[name] = "fresh"
+                    del pending[name]
+                    continue
+                need = TASK_MEMORY_MB.get(task.kind, 256)
+                if len(running) >= jobs or (running and mem_in_use + need > mem_mb):
+                    continue
+                print(f"  start    {name}")
+                fut = pool.submit(_run_task, task.kind, task.params)
+                running[fut] = task
+                mem_in_use += need
+                del pending[name]
+
+            if not running:
+                if pending:  # only unresolved tasks left -> nothing can make progress
+                    for name in pending:
+                        state[name] = "blocked"
+                    pending.clear()
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                task = running.pop(fut)
+                mem_in_use -= TASK_MEMORY_MB.get(task.kind, 256)
+                try:
+                    ok = fut.result()
+                except Exception as e:
+                    print(f"  ERROR in {task.name}: {e}")
+                    ok = False
+                state[task.name] = "ran" if ok else "failed"
+                print(f"  {'done  ' if ok else 'FAILED'}   {task.name}")
+
+    counts = {s: sum(1 for v in state.values() if v == s) for s in ("ran", "fresh", "failed", "blocked")}
+    print(f"Pipeline: {counts['ran']} ran, {counts['fresh']} up to date, "
+          f"{counts['failed']} failed, {counts['blocked']} blocked")
+    return counts["failed"] == 0 and counts["blocked"] == 0
+
+
+# ── Watch mode ────────────────────────────────────────────────────────────────
+class _InotifyWatcher:
+    """Minimal inotify binding (Linux) via ctypes."""
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+
+    def __init__(self, folders: list[Path]):
+        import ctypes
+        import ctypes.util
+        import struct
+        self._struct = struct
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        for folder in folders:
+            if self._libc.inotify_add_watch(self._fd, str(folder).encode(), mask) < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {folder}")
+
+    def wait_for_change(self) -> set[str]:
+        """Block until a watched file changes; returns the changed file names."""
+        import select
+        names: set[str] = set()
+        while not names:
+            buf = os.read(self._fd, 64 * 1024)
+            names |= self._parse(buf)
+            # Debounce: collect the burst of events an editor save produces
+            while select.select([self._fd], [], [], WATCH_DEBOUNCE_S)[0]:
+                names |= self._parse(os.read(self._fd, 64 * 1024))
+            names = {n for n in names if Path(n).suffix.lower() in WATCH_SUFFIXES}
+        return names
+
+    def _parse(self, buf: bytes) -> set[str]:
+        names, offset = set(), 0
+        while offset < len(buf):
+            _, _, _, length = self._struct.unpack_from("iIII", buf, offset)
+            offset += 16
+            names.add(buf[offset:offset + length].rstrip(b"\0").decode(errors="replace"))
+            offset += length
+        return names
+
+
+class _PollingWatcher:
+    """Portable fallback: compares .pptx/.tex mtimes once a second."""
+
+    def __init__(self, folders: list[Path]):
+        self._folders = folders
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[Path, int]:
+        return {
+            p: p.stat().st_mtime_ns
+            for folder in self._folders for p in folder.iterdir()
+            if p.suffix.lower() in WATCH_SUFFIXES and p.is_file()
+        }
+
+    def wait_for_change(self) -> set[str]:
+        while True:
+            time.sleep(1)
+            snap = self._scan()
+            changed = {p.name for p, m in snap.items() if self._snapshot.get(p) != m}
+            self._snapshot = snap
+            if changed:
+                return changed
+
+
+def watch(sources: list[Path], template: str | None, jobs: int | None, mem_mb: int | None):
+    folders = sorted({(s if s.is_dir() else s.parent).resolve() for s in sources})
+    try:
+        watcher = _InotifyWatcher(folders)
+        kind = "inotify"
+    except (OSError, AttributeError, TypeError):
+        watcher = _PollingWatcher(folders)
+        kind = "polling"
+    execute(plan(sources, template), jobs, mem_mb)
+    print(f"\nWatching {len(folders)} folder(s) ({kind}); Ctrl+C to stop.")
+    try:
+        while True:
+            changed = watcher.wait_for_change()
+            print(f"\nChanged: {', '.join(sorted(changed))}")
+            execute(plan(sources, template), jobs, mem_mb)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def run_pipeline(sources: list[str], template: str | None = None, jobs: int | None = None,
+                 mem_mb: int | None = None, watch_mode: bool = False) -> bool:
+    paths = [Path(s) for s in sources]
+    missing = [p for p in paths if not p.exists()]
+    if missing:
+        print(f"ERROR: not found: {', '.join(map(str, missing))}")
+        return False
+    if watch_mode:
+        watch(paths, template, jobs, mem_mb)
+        return True
+    tasks = plan(paths, template)
+    if not tasks:
+        print("Nothing to do: no .pptx or .tex inputs found.")
+        return True
+    return execute(tasks, jobs, mem_mb)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python pipeline.py <folder|file ...> [--template math|cs|stats] "
+              "[--jobs N] [--mem-mb MB] [--watch]")
+        sys.exit(1)
+
+    args = sys.argv[1:]
+    inputs, template_name, n_jobs, mem_limit, watch_flag = [], None, None, None, False
+    i = 0
+    while i < len(args):
+        if args[i] == "--template" and i + 1 < len(args):
+            template_name = args[i + 1]
+            i += 2
+        elif args[i] == "--jobs" and i + 1 < len(args):
+            n_jobs = int(args[i + 1])
+            i += 2
+        elif args[i] == "--mem-mb" and i + 1 < len(args):
+            mem_limit = int(args[i + 1])
+            i += 2
+        elif args[i] == "--watch":
+            watch_flag = True
+            i += 1
+        else:
+            inputs.append(args[i])
+            i += 1
+
+    ok = run_pipeline(inputs, template_name, n_jobs, mem_limit, watch_flag)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,222 @@
+"""
+CUHKsz Course Helper - Subprocess Runner
+One way to run external tools (pdflatex, soffice, pip, package managers)
+from compile_latex.py, convert_to_pdf.py, ensure_deps.py and the modules
+built on them, so a bad input cannot hang or exhaust a batch.
+
+Every command runs:
+  - in its own process group (session), so on timeout the whole tree is
+    killed, including helpers such as soffice.bin that outlive the launcher.
+    isolate=False keeps the caller's session (needed for sudo to ask for a
+    password on the terminal); then only the process itself is killed
+  - with stdin closed, so a tool waiting for input (a TeX error prompt, a
+    sudo password) fails instead of waiting forever
+  - with optional limits: wall-clock `timeout`, `cpu_seconds` (RLIMIT_CPU)
+    and `memory_mb` (RLIMIT_AS); rlimits are POSIX-only and ignored on Windows
+  - with stdout/stderr read line by line as they arrive: each line goes to
+    the optional on_output callback and only the last `tail_lines` lines of
+    each stream are kept
+
+The result is a RunResult instead of an exception: a missing executable, a
+timeout or a resource-limit kill all come back as data, so batch callers
+record the failure and move on.
+
+Usage:
+    python proc_runner.py [--timeout S] [--cpu S] [--memory MB] -- <command ...>
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+
+# Grace period between SIGTERM and SIGKILL when a process group is stopped
+KILL_GRACE_S = 5.0
+# How long to wait for output pipes after the main process exits before
+# assuming a leftover child holds them open (and killing the group)
+PIPE_DRAIN_S = 2.0
+DEFAULT_TAIL_LINES = 200
+
+
+@dataclass
+class RunResult:
+    args: list[str]
+    returncode: int | None            # None if the process never started
+    stdout: str = ""                  # last tail_lines lines
+    stderr: str = ""
+    duration: float = 0.0             # seconds
+    timed_out: bool = False
+    error: str | None = None          # why the process could not be started
+    limits: dict = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and self.error is None
+
+    @property
+    def output(self) -> str:
+        return self.stdout + self.stderr
+
+    def describe(self) -> str:
+        """Short human-readable outcome, e.g. 'timed out after 300 s'."""
+        if self.error:
+            return self.error
+        if self.timed_out:
+            return f"timed out after {self.limits.get('timeout', self.duration):g} s"
+        if self.returncode is not None and self.returncode < 0:
+            sig = -self.returncode
+            try:
+                name = signal.Signals(sig).name
+            except ValueError:
+                name = f"signal {sig}"
+            if name == "SIGXCPU":
+                return f"killed: CPU limit of {self.limits.get('cpu_seconds')} s exceeded"
+            return f"killed by {name}"
+        return f"exit code {self.returncode}"
+
+
+def _rlimit_setter(cpu_seconds: int | None, memory_mb: int | None):
+    """
+    preexec_fn applying the rlimits in the child before exec. run() is called
+    from threads, and between fork and exec only async-signal-safe work is
+    safe, so everything is prepared here in the parent and the child only
+    calls setrlimit (no imports, no allocation beyond the call itself).
+    """
+    limits = []
+    if cpu_seconds:
+        # Soft limit sends SIGXCPU; the hard limit a little later sends SIGKILL
+        limits.append((resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 5)))
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        limits.append((resource.RLIMIT_AS, (limit, limit)))
+    setrlimit = resource.setrlimit
+
+    def apply():
+        for which, value in limits:
+            setrlimit(which, value)
+    return apply
+
+
+def _kill_group(proc: subprocess.Popen, isolated: bool = True):
+    """Stop proc and every process in its group: SIGTERM, then SIGKILL."""
+    if not isolated:
+        proc.kill()
+        return
+    if os.name == "nt":
+        # taskkill /T also ends child processes (soffice.exe -> soffice.bin)
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+    try:
+        proc.wait(timeout=KILL_GRACE_S)
+    except subprocess.TimeoutExpired:
+        pass
+    # Whatever is left of the group (or a leader that ignored SIGTERM)
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _pump(stream, name: str, tail: deque, on_output):
+    for line in stream:
+        tail.append(line)
+        if on_output is not None:
+            on_output(name, line)
+    stream.close()
+
+
+def run(args: list[str], *, cwd=None, env: dict | None = None, timeout: float | None = None,
+        cpu_seconds: int | None = None, memory_mb: int | None = None,
+        on_output=None, tail_lines: int = DEFAULT_TAIL_LINES, isolate: bool = True) -> RunResult:
+    """
+    Run args to completion under the given limits and return a RunResult.
+    on_output(stream_name, line) is called for every line ("stdout"/"stderr").
+    """
+    args = [str(a) for a in args]
+    limits = {k: v for k, v in (("timeout", timeout), ("cpu_seconds", cpu_seconds),
+                                ("memory_mb", memory_mb)) if v}
+    popen_kwargs = {}
+    if os.name == "nt":
+        if isolate:
+            popen_kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        popen_kwargs["start_new_session"] = isolate
+        if (cpu_seconds or memory_mb) and resource is not None:
+            popen_kwargs["preexec_fn"] = _rlimit_setter(cpu_seconds, memory_mb)
+
+    start = time.monotonic()
+    try:
+        proc = subprocess.Popen(
+            args, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="replace", **popen_kwargs,
+        )
+    except (FileNotFoundError, PermissionError, OSError) as e:
+        return RunResult(args, None, error=f"could not start {args[0]}: {e.strerror or e}",
+                         limits=limits)
+
+    tails = {"stdout": deque(maxlen=tail_lines), "stderr": deque(maxlen=tail_lines)}
+    readers = [
+        threading.Thread(target=_pump, args=(getattr(proc, name), name, tails[name], on_output),
+                         daemon=True)
+        for name in tails
+    ]
+    for t in readers:
+        t.start()
+
+    timed_out = False
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        _kill_group(proc, isolate)
+        proc.wait()
+    except KeyboardInterrupt:
+        _kill_group(proc, isolate)
+        raise
+
+    for t in readers:
+        t.join(PIPE_DRAIN_S)
+    if any(t.is_alive() for t in readers) and isolate:
+        # A detached child still holds the pipes: stop the whole group
+        _kill_group(proc)
+        for t in readers:
+            t.join(PIPE_DRAIN_S)
+
+    return RunResult(
+        args, proc.returncode,
+        stdout="".join(tails["stdout"]), stderr="".join(tails["stderr"]),
+        duration=time.monotonic() - start, timed_out=timed_out, limits=limits,
+    )
+
+
+if __name__ == "__main__":
+    cli = sys.argv[1:]
+    if "--" not in cli:
+        print("Usage: python proc_runner.py [--timeout S] [--cpu S] [--memory MB] -- <command ...>")
+        sys.exit(1)
+    split = cli.index("--")
+    opts, command = cli[:split], cli[split + 1:]
+    kw = {}
+    for flag, key, conv in (("--timeout", "timeout", float), ("--cpu", "cpu_seconds", int),
+                            ("--memory", "memory_mb", int)):
+        if flag in opts:
+            kw[key] = conv(opts[opts.index(flag) + 1])
+    result = run(command, on_output=lambda _, line: print(line, end=""), **kw)
+    print(f"\n[{result.describe()}, {result.duration:.1f} s]")
+    sys.exit(0 if result.ok else 1)
@@ -0,0 +1,21 @@
+"""
+CUHKsz Course Helper - Reproducible Build Dates
+The one timestamp written into generated files (PPTX core properties and zip
+entries in build_pptx.py, PDF dates in compile_latex.py), so the same input
+gives byte-identical output. Set SOURCE_DATE_EPOCH to choose the date.
+"""
+
+import os
+
+
+# 1980-01-01 00:00 UTC, the earliest timestamp a zip entry can hold, so PPTX
+# and PDF outputs default to the same date
+REPRODUCIBLE_EPOCH = 315532800
+
+
+def source_date_epoch() -> int:
+    """SOURCE_DATE_EPOCH from the environment, else REPRODUCIBLE_EPOCH."""
+    try:
+        return int(os.environ["SOURCE_DATE_EPOCH"])
+    except (KeyError, ValueError):
+        return REPRODUCIBLE_EPOCH
@@ -0,0 +1,352 @@
+"""
+CUHKsz Course Helper - Sharded Beamer Compilation
+Compiles a large beamer deck on several cores: the frames are split into K
+contiguous shards, each shard typesets only its own frames in its own
+pdflatex process, and the pages are merged with PyMuPDF.
+
+How the deck stays correct:
+  1. Draft pass: the whole deck once with graphicx in draft mode (images
+     become empty boxes of the same size, so it is fast). Every top-level
+     frame gets a label, and a marker before it logs the page it starts
+     on; before the first frame of each shard the marker also logs every
+     LaTeX counter. The .aux/.nav/.toc/.out files record the full-deck
+     outline, frame totals and section structure.
+  2. Shards: each shard starts from a copy of the draft pass's auxiliary
+     files and is restricted to its own frames with beamer's
+     \\includeonlyframes, so frames outside its range are skipped without
+     being typeset. Before its first frame the counters (page, framenumber,
+     section, equation, ...) are set to the values the draft logged there,
+     so page numbers, \\insertframenumber and numbering continue exactly as
+     in the whole deck; \\inserttotalframenumber, section headers and the
+     outline come from the aux files.
+  3. Merge: the shard PDFs are concatenated. Internal links and bookmarks
+     are resolved by destination name against the draft PDF, which has the
+     same layout and every destination; page labels come from it too.
+
+The draft pass is the part that does not shrink with K: wall time is about
+one text-only pass plus 1/K of a full compile. Decks whose frames are not all
+written out in the main file (\\input / \\include in the document body,
+\\againframe, frames made by \\AtBeginSection and the like) cannot be
+restricted frame by frame and are compiled the normal way, as is any deck
+whose shard page counts do not match the draft pass.
+
+Usage:
+    python shard_latex.py <input.tex> [output_dir] [--shards K]
+    python compile_latex.py <input.tex> [output_dir] --shards K   (same thing)
+
+--shards 0 uses one shard per CPU core.
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from compile_latex import REPRODUCIBLE_PREAMBLE, compile_tex, latex_failed, print_log_tail, run_latex
+from ensure_deps import find_pdflatex
+from repro import source_date_epoch
+
+
+# Frames per shard below which splitting further does not pay off
+MIN_FRAMES_PER_SHARD = 4
+# Shard balancing weight of one \includegraphics relative to one frame of text
+IMAGE_WEIGHT = 4
+
+_FRAME_START = re.compile(r"^(\s*)(\\begin\{frame\}|\\frame(?![A-Za-z@]))", re.M)
+# Optional overlay spec and default overlay spec, then the options bracket if any
+_FRAME_ARGS = re.compile(r"\s*(?:<[^>\n]*>)?\s*(?:\[<[^\]\n]*>\])?\s*(\[)?")
+_FRAME_LABEL = re.compile(r"(?:^|,)\s*label\s*=\s*\{?([^,{}\]\s]+)")
+_BEGIN_DOCUMENT = re.compile(r"^[^%\n]*\\begin\{document\}", re.M)
+_BEAMER_CLASS = re.compile(r"^[^%\n]*\\documentclass\s*(\[[^\]]*\])?\s*\{beamer\}", re.M)
+# Frames mark_frames cannot see or label, in the preamble or the body
+_HIDDEN_FRAMES = re.compile(r"^[^%\n]*\\(againframe|AtBegin(Part|Lecture|Section|Subsection|Subsubsection)\b)", re.M)
+_BODY_INPUT = re.compile(r"^[^%\n]*\\(input|include)(?![A-Za-z@])", re.M)
+_MARK_LOG = re.compile(r"^CUHKSZFRAME (\d+) (\d+)$", re.M)
+_COUNTER_LOG = re.compile(r"^CUHKSZCOUNTER (\d+) (\S+) (-?\d+)$", re.M)
+_AUX_SUFFIXES = (".aux", ".nav", ".toc", ".out", ".snm", ".vrb")
+
+
+# ── Source preparation ────────────────────────────────────────────────────────
+def _label_frame(frame: str, cmd_end: int, label: str) -> tuple[str, str]:
+    """Give a frame label= unless it has one; returns (frame, its label)."""
+    m = _FRAME_ARGS.match(frame, cmd_end)
+    if not m.group(1):
+        return f"{frame[:m.end()]}[label={label}]{frame[m.end():]}", label
+    depth = 0
+    for j in range(m.end(), len(frame)):
+        if frame[j] == "{":
+            depth += 1
+        elif frame[j] == "}":
+            depth -= 1
+        elif frame[j] == "]" and depth == 0:
+            own = _FRAME_LABEL.search(frame[m.end():j])
+            if own:
+                return frame, own.group(1)
+            break
+    return f"{frame[:m.end()]}label={label},{frame[m.end():]}", label
+
+
+def mark_frames(source: str) -> tuple[str, list[str], list[int]]:
+    """
+    Label every top-level frame of the document body and insert
+    \\cuhkszframe{i} before it. Returns the marked source, the label and a
+    balancing weight per frame.
+    """
+    m = _BEGIN_DOCUMENT.search(source)
+    if not m:
+        return source, [], []
+    head, body = source[:m.end()], source[m.end():]
+    starts = [f.start() for f in _FRAME_START.finditer(body)]
+    if not starts:
+        return source, [], []
+
+    labels, weights, pieces = [], [], [body[:starts[0]]]
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(body)
+        frame = body[start:end]
+        weights.append(1 + IMAGE_WEIGHT * frame.count("\\includegraphics"))
+        fm = _FRAME_START.match(frame)
+        indent = fm.group(1)
+        frame, label = _label_frame(frame, fm.end(), f"cuhkszframe{i}")
+        labels.append(label)
+        pieces.append(f"{indent}\\cuhkszframe{{{i}}}{frame[len(indent):]}")
+    return head + "".join(pieces), labels, weights
+
+
+def split_frames(weights: list[int], shards: int) -> list[tuple[int, int]]:
+    """Contiguous [first, end) frame ranges with roughly equal total weight."""
+    total = sum(weights)
+    bounds, acc = [0], 0
+    for i, w in enumerate(weights):
+        acc += w
+        if len(bounds) < shards and acc >= total * len(bounds) / shards and i + 1 < len(weights):
+            bounds.append(i + 1)
+    bounds.append(len(weights))
+    return list(zip(bounds, bounds[1:]))
+
+
+# ── pdflatex runs ─────────────────────────────────────────────────────────────
+def _latex_args(pdflatex: str, out_dir: Path, jobname: str, source: str, macros: str) -> list[str]:
+    return [
+        pdflatex,
+        "-interaction=nonstopmode",
+        f"-output-directory={out_dir}",
+        f"-jobname={jobname}",
+        f"{REPRODUCIBLE_PREAMBLE}{macros}\\input{{{source}}}",
+    ]
+
+
+def _draft_macros(shard_starts: list[int]) -> str:
+    """Log every frame's page, and all counters before each shard's first frame."""
+    dump = "".join(r"\ifnum#1=" + str(i) + r" \cuhkszcounters{#1}\fi" for i in shard_starts)
+    return (r"\PassOptionsToPackage{draft}{graphicx}"
+            # \cl@@ckpt lists every counter made by \newcounter, as \@elt{name}
+            r"\def\cuhkszcounters#1{\begingroup"
+            r"\expandafter\def\csname @elt\endcsname##1{\typeout{CUHKSZCOUNTER #1 ##1 \the\value{##1}}}"
+            r"\csname cl@@ckpt\endcsname\endgroup}"
+            r"\def\cuhkszframe#1{\typeout{CUHKSZFRAME #1 \the\value{page}}" + dump + "}")
+
+
+def _shard_macros(labels: list[str], first: int, counters: list[tuple[str, str]]) -> str:
+    """Typeset only `labels`, with the draft's counter values before frame `first`."""
+    restore = "".join(rf"\setcounter{{{name}}}{{{value}}}" for name, value in counters)
+    return (rf"\AtBeginDocument{{\includeonlyframes{{{','.join(labels)}}}}}"
+            + r"\def\cuhkszframe#1{\ifnum#1=" + str(first) + " " + restore + r"\fi}")
+
+
+def _failed(r, log: Path) -> bool:
+    if latex_failed(r):
+        print_log_tail(log)
+        print(f"  pdflatex: {r.describe()}")
+        return True
+    return False
+
+
+def _merge(draft_pdf: Path, shard_pdfs: list[Path], dest: Path, fitz):
+    """
+    Concatenate the shard PDFs. Links and bookmarks point at named
+    destinations; they are resolved in the draft PDF, which has them all on
+    the same pages as the merged deck.
+    """
+    merged = fitz.open()
+    draft = fitz.open(str(draft_pdf))
+    names = draft.resolve_names()
+    toc = None
+    for pdf in shard_pdfs:
+        src = fitz.open(str(pdf))
+        offset = merged.page_count
+        merged.insert_pdf(src, links=False)
+        for pno in range(src.page_count):
+            for link in src[pno].get_links():
+                link.pop("xref", None)
+                link.pop("id", None)
+                if link["kind"] in (fitz.LINK_GOTO, fitz.LINK_NAMED):
+                    target = names.get(link.get("nameddest"))
+                    if target:
+                        page, to = target["page"], fitz.Point(target.get("to") or (0, 0))
+                    elif "nameddest" not in link and link.get("page", -1) >= 0:
+                        page, to = offset + link["page"], link.get("to", fitz.Point(0, 0))
+                    else:
+                        continue
+                    link = {"kind": fitz.LINK_GOTO, "from": link["from"], "page": page, "to": to}
+                merged[offset + pno].insert_link(link)
+        if toc is None:
+            toc = []
+            for level, title, page, where in src.get_toc(simple=False):
+                target = names.get(where.get("nameddest"))
+                toc.append([level, title, target["page"] + 1 if target else page])
+        src.close()
+
+    merged.set_toc(toc or [])
+    labels = draft.get_page_labels()
+    if labels:
+        merged.set_page_labels(labels)
+    merged.set_metadata(draft.metadata)
+    draft.close()
+    merged.save(str(dest), garbage=3, deflate=True, no_new_id=True)
+    merged.close()
+
+
+def _shardable(source: str, labels: list[str]) -> str | None:
+    """Why the deck cannot be compiled frame by frame, or None if it can."""
+    if not _BEAMER_CLASS.search(source):
+        return "not a beamer deck"
+    hidden = _HIDDEN_FRAMES.search(source)
+    if hidden:
+        return f"uses \\{hidden.group(1)}"
+    body = source[_BEGIN_DOCUMENT.search(source).end():]
+    if _BODY_INPUT.search(body):
+        return "frames may be in \\input or \\include files"
+    if len(set(labels)) < len(labels):
+        return "duplicate frame labels"
+    return None
+
+
+def compile_tex_sharded(tex_path: str, output_dir: str = None, shards: int = 0) -> str | None:
+    """
+    Compile a beamer .tex in `shards` parallel pdflatex processes (0 = one
+    per CPU), each typesetting only its own frames. Falls back to
+    compile_tex for small decks and decks that cannot be split by frame.
+    """
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        try:
+            import fitz
+        except ImportError:
+            print("ERROR: PyMuPDF not installed. Run: pip install pymupdf")
+            return None
+
+    tex_path = Path(tex_path).resolve()
+    if not tex_path.exists():
+        print(f"ERROR: File not found: {tex_path}")
+        return None
+    pdflatex = find_pdflatex()
+    if not pdflatex:
+        print("ERROR: pdflatex not found. Install MiKTeX (Windows) or TeX Live (Linux/macOS).")
+        return None
+
+    source = tex_path.read_text(encoding="utf-8", errors="surrogateescape")
+    marked, labels, weights = mark_frames(source)
+    shards = shards or os.cpu_count() or 1
+    shards = min(shards, len(weights) // MIN_FRAMES_PER_SHARD)
+    reason = "too few frames" if shards < 2 else _shardable(source, labels)
+    if reason:
+        print(f"Not sharding {tex_path.name} ({reason})")
+        return compile_tex(str(tex_path), output_dir)
+    ranges = split_frames(weights, shards)
+
+    tex_dir = tex_path.parent
+    stem = tex_path.stem
+    tmp_dir = Path(tempfile.mkdtemp(prefix="_cuhksz_build_", dir=tex_dir))
+    env = {**os.environ, "SOURCE_DATE_EPOCH": str(source_date_epoch())}
+    try:
+        # Relative to tex_dir, so \includegraphics{images/...} still resolves
+        marked_tex = tmp_dir / tex_path.name
+        marked_tex.write_text(marked, encoding="utf-8", errors="surrogateescape")
+        marked_rel = marked_tex.relative_to(tex_dir).as_posix()
+
+        # 1. Draft pass: page of every frame, counters at shard starts, aux state
+        print(f"Compiling (draft): {tex_path.name} ({len(weights)} frames)")
+        draft_dir = tmp_dir / "draft"
+        draft_dir.mkdir()
+        macros = _draft_macros([first for first, _ in ranges[1:]])
+        r = run_latex(_latex_args(pdflatex, draft_dir, stem, marked_rel, macros), tex_dir, env)
+        draft_log = draft_dir / f"{stem}.log"
+        draft_pdf = draft_dir / f"{stem}.pdf"
+        if _failed(r, draft_log) or not draft_pdf.exists():
+            print("ERROR: LaTeX compilation failed.")
+            return None
+        log_text = draft_log.read_text(encoding="utf-8", errors="ignore") if draft_log.exists() else ""
+        frame_page = {int(i): int(p) for i, p in _MARK_LOG.findall(log_text)}
+        counters: dict[int, list[tuple[str, str]]] = {}
+        for i, name, value in _COUNTER_LOG.findall(log_text):
+            counters.setdefault(int(i), []).append((name, value))
+        with fitz.open(str(draft_pdf)) as d:
+            n_pages = d.page_count
+        if len(frame_page) != len(weights) or any(first not in counters for first, _ in ranges[1:]):
+            print("  Frame markers missing from the draft log; compiling without shards")
+            return compile_tex(str(tex_path), output_dir)
+
+        # 2. Shards in parallel, each seeded with the draft aux files
+        page_counts, shard_args = [], []
+        for k, (first, end) in enumerate(ranges):
+            first_page = 1 if k == 0 else frame_page[first]
+            last_page = n_pages if end == len(weights) else frame_page[end] - 1
+            page_counts.append(last_page - first_page + 1)
+            shard_dir = tmp_dir / f"shard{k}"
+            shard_dir.mkdir()
+            for suffix in _AUX_SUFFIXES:
+                aux = draft_dir / f"{stem}{suffix}"
+                if aux.exists():
+                    shutil.copy(aux, shard_dir / aux.name)
+            shard_args.append(_latex_args(pdflatex, shard_dir, stem, marked_rel,
+                                          _shard_macros(labels[first:end], first, counters.get(first, []))))
+        print(f"Compiling ({len(ranges)} shards): "
+              + ", ".join(f"frames {a + 1}-{b}" for a, b in ranges))
+        # Threads only wait on the pdflatex processes, which do the work
+        with ThreadPoolExecutor(max_workers=len(shard_args)) as pool:
+            results = list(pool.map(lambda a: run_latex(a, tex_dir, env), shard_args))
+
+        shard_pdfs, ok = [], True
+        for k, r in enumerate(results):
+            shard_dir = tmp_dir / f"shard{k}"
+            pdf = shard_dir / f"{stem}.pdf"
+            if _failed(r, shard_dir / f"{stem}.log") or not pdf.exists():
+                ok = False
+            shard_pdfs.append(pdf)
+        if not ok:
+            print("ERROR: LaTeX compilation failed.")
+            return None
+        for pdf, expected in zip(shard_pdfs, page_counts):
+            with fitz.open(str(pdf)) as d:
+                if d.page_count != expected:
+                    print("  Shard layout differs from the draft pass; compiling without shards")
+                    return compile_tex(str(tex_path), output_dir)
+
+        # 3. Merge
+        dest_dir = Path(output_dir) if output_dir else tex_dir
+        dest = dest_dir / f"{stem}.pdf"
+        _merge(draft_pdf, shard_pdfs, dest, fitz)
+        print(f"Done: {dest}")
+        return str(dest)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python shard_latex.py <input.tex> [output_dir] [--shards K]")
+        sys.exit(1)
+
+    cli_args = sys.argv[1:]
+    n_shards = 0
+    if "--shards" in cli_args:
+        i = cli_args.index("--shards")
+        n_shards = int(cli_args[i + 1])
+        del cli_args[i:i + 2]
+    result = compile_tex_sharded(cli_args[0], cli_args[1] if len(cli_args) > 1 else None, n_shards)
+    sys.exit(0 if result else 1)
@@ -0,0 +1,137 @@
+"""
+CUHKsz Course Helper - Slide Data I/O
+Shared loading, schema check and JSON (de)serialization for the slide-record
+structure produced by extract_content.py and consumed by build_pptx.py.
+
+JSON goes through orjson when it is installed (several times faster on large
+decks) and through the standard library otherwise; output is identical
+UTF-8 JSON with two-space indentation either way.
+
+Accepted deck sources (load_deck):
+  - dict with a "slides" list (the extract_content.py structure)
+  - a single slide record dict, or any iterable of slide record dicts
+  - path to a .json file, or to a .jsonl file (one slide record per line)
+  - JSON / JSONL text (str or bytes)
+  - an open text or binary file object with JSON or JSONL content
+"""
+
+import json
+from os import PathLike
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Fields every slide record is normalized to carry, with their defaults
+SLIDE_DEFAULTS = {
+    "type": "content",
+    "title": "",
+    "body_text": [],
+    "notes": "",
+    "image_paths": [],
+    "is_ai_generated": False,
+}
+
+
+# ── JSON backend ──────────────────────────────────────────────────────────────
+def loads(text: str | bytes):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def dumps(obj) -> bytes:
+    """Serialize obj to indented UTF-8 JSON bytes (non-ASCII kept as-is)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def write_json(obj, path: str | PathLike):
+    Path(path).write_bytes(dumps(obj))
+
+
+def read_json(path: str | PathLike):
+    return loads(Path(path).read_bytes())
+
+
+# ── Deck loading ──────────────────────────────────────────────────────────────
+def _parse_text(text: str | bytes):
+    """Parse JSON, falling back to JSONL (one record per non-empty line)."""
+    try:
+        return loads(text)
+    except ValueError:
+        if isinstance(text, bytes):
+            text = text.decode("utf-8")
+        lines = [line for line in text.splitlines() if line.strip()]
+        if len(lines) < 2:
+            raise
+        return [loads(line) for line in lines]
+
+
+def _looks_like_json(text: str) -> bool:
+    return text.lstrip()[:1] in ("{", "[")
+
+
+def load_deck(source) -> dict:
+    """Return a deck dict ({"slides": [...], ...}) from any supported source."""
+    if isinstance(source, dict):
+        data = source if "slides" in source else {"slides": [source]}
+    elif isinstance(source, (bytes, bytearray)):
+        data = _parse_text(bytes(source))
+    elif isinstance(source, str) and _looks_like_json(source):
+        # Inline JSON — never passed to the filesystem, so long strings are fine
+        data = _parse_text(source)
+    elif isinstance(source, (str, PathLike)):
+        path = Path(source)
+        if not path.exists():
+            raise FileNotFoundError(f"Content file not found: {path}")
+        if path.suffix.lower() == ".jsonl":
+            with open(path, "rb") as f:
+                data = [loads(line) for line in f if line.strip()]
+        else:
+            data = _parse_text(path.read_bytes())
+    elif hasattr(source, "read"):
+        data = _parse_text(source.read())
+    else:
+        # Any other iterable of slide records (list, generator, ...)
+        data = list(source)
+
+    if isinstance(data, list):
+        data = {"slides": data}
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a deck object or slide list, got {type(data).__name__}")
+    return data
+
+
+def validate_slides(data: dict) -> list[dict]:
+    """
+    Check the slide records of a deck once and return them normalized:
+    every SLIDE_DEFAULTS field present with the right type. A body_text given
+    as one string is split into lines. Raises ValueError naming the slide.
+    """
+    slides = data.get("slides")
+    if not isinstance(slides, list):
+        raise ValueError('Deck has no "slides" list')
+
+    normalized = []
+    for pos, slide in enumerate(slides, start=1):
+        if not isinstance(slide, dict):
+            raise ValueError(f"Slide {pos}: expected an object, got {type(slide).__name__}")
+        record = {**SLIDE_DEFAULTS, **slide}
+        if isinstance(record["body_text"], str):
+            record["body_text"] = record["body_text"].splitlines()
+        for key in ("type", "title", "notes"):
+            if record[key] is None:
+                record[key] = SLIDE_DEFAULTS[key]
+            if not isinstance(record[key], str):
+                raise ValueError(f"Slide {pos}: {key!r} must be a string")
+        for key in ("body_text", "image_paths"):
+            if not isinstance(record[key], list) or not all(isinstance(x, str) for x in record[key]):
+                raise ValueError(f"Slide {pos}: {key!r} must be a list of strings")
+        record["is_ai_generated"] = bool(record["is_ai_generated"])
+        normalized.append(record)
+    return normalized
@@ -0,0 +1,307 @@
+"""
+CUHKsz Course Helper - Text Fitting
+Measures how much room slide text takes at build time, so build_pptx.py can
+shrink a slightly overfull text frame or move the overflow to continuation
+slides instead of letting it run past the footer.
+
+Text is measured with glyph-advance tables for the template fonts, shipped in
+data/font_metrics.json (1/1000 em per code point, regular/bold/italic/
+bold-italic). The tables come from the metric-compatible PDF base fonts:
+Times (Times New Roman), Helvetica (Arial) and Courier (Courier New). They
+are loaded once per process and word widths and paragraph break points are
+cached, so a 500-slide deck measures in milliseconds without rendering.
+Fonts without a table are measured as Arial. East Asian wide characters
+count as 1 em and may break anywhere; other text wraps at spaces, like
+PowerPoint.
+
+Usage:
+    python text_fit.py <content.json> [--template math|cs|stats]   # report overfull slides
+    python text_fit.py --rebuild-metrics                          # regenerate the tables (needs PyMuPDF)
+"""
+
+import re
+import sys
+import unicodedata
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+
+
+METRICS_FILE = Path(__file__).parent / "data" / "font_metrics.json"
+
+# Slide font -> family in METRICS_FILE
+FONT_FAMILIES = {
+    "Times New Roman": "Times New Roman",
+    "Arial": "Arial",
+    "Courier New": "Courier New",
+}
+DEFAULT_FAMILY = "Arial"
+
+# PowerPoint single line spacing, as a multiple of the font size
+LINE_SPACING = 1.2
+# Font size step used when shrinking text to fit (points)
+SHRINK_STEP = 0.5
+
+# PyMuPDF base-14 font per (family, style) for --rebuild-metrics
+_BASE14 = {
+    "Times New Roman": {"regular": "tiro", "bold": "tibo", "italic": "tiit", "bolditalic": "tibi"},
+    "Arial": {"regular": "helv", "bold": "hebo", "italic": "heit", "bolditalic": "hebi"},
+    "Courier New": {"regular": "cour", "bold": "cobo", "italic": "coit", "bolditalic": "cobi"},
+}
+# Latin, Greek, general punctuation, arrows, mathematical operators
+_MEASURED_RANGES = [(0x20, 0x250), (0x370, 0x400), (0x2000, 0x2070), (0x2190, 0x2300)]
+
+# Line-break units: a word (or one East Asian wide character, which may break
+# anywhere) with the spaces after it
+_WIDE = r"\u1100-\u11ff\u2e80-\ua4cf\uac00-\ud7af\uf900-\ufaff\ufe30-\ufe4f\uff00-\uffef"
+_TOKEN = re.compile(rf"[{_WIDE}]\s*|[^\s{_WIDE}]+\s*")
+_TOKEN_ASCII = re.compile(r"\S+\s*")
+
+
+# ── Glyph tables ──────────────────────────────────────────────────────────────
+@lru_cache(maxsize=1)
+def _load_tables() -> dict:
+    from slide_io import read_json
+    return read_json(METRICS_FILE)
+
+
+class _Memo(dict):
+    """dict that computes missing entries with func on first lookup."""
+
+    def __init__(self, func, *args):
+        super().__init__(*args)
+        self.func = func
+
+    def __missing__(self, key):
+        value = self[key] = self.func(key)
+        return value
+
+
+class FontMetrics:
+    """Advance widths of one font style; widths are in points at 1 pt size."""
+
+    def __init__(self, widths: dict[str, float], default: float):
+        self.default = default
+        # Lookups go through dict.__getitem__ so sums run in C (map + sum)
+        self.chars = _Memo(self._unlisted_width, widths)
+        self.words = _Memo(lambda word: sum(map(self.chars.__getitem__, word)))
+        self._tokens = _Memo(self._tokenize)
+
+    def _unlisted_width(self, ch: str) -> float:
+        return 1.0 if unicodedata.east_asian_width(ch) in ("W", "F") else self.default
+
+    def _tokenize(self, text: str) -> tuple[list[str], list[float]]:
+        body = text.lstrip()
+        tokens = (_TOKEN_ASCII if body.isascii() else _TOKEN).findall(body)
+        if len(body) < len(text):
+            tokens.insert(0, text[:len(text) - len(body)])  # indentation
+        return tokens, [0.0, *accumulate(map(self.words.__getitem__, tokens))]
+
+    def text_width(self, text: str) -> float:
+        """Width of text on one line at 1 pt; multiply by the font size."""
+        return self._tokens[text][1][-1]
+
+    def tokens(self, text: str) -> tuple[list[str], list[float]]:
+        """Break-opportunity tokens of a paragraph and their running widths at 1 pt."""
+        return self._tokens[text]
+
+
+@lru_cache(maxsize=None)
+def get_metrics(font_name: str, bold: bool = False, italic: bool = False) -> FontMetrics:
+    family = FONT_FAMILIES.get(font_name, DEFAULT_FAMILY)
+    style = ("bold" if bold else "") + ("italic" if italic else "") or "regular"
+    table = _load_tables()[family][style]
+    widths = {}
+    for start, run in table["runs"]:
+        for offset, w in enumerate(run):
+            if w:
+                widths[chr(start + offset)] = w / 1000
+    return FontMetrics(widths, table["default"] / 1000)
+
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+def line_starts(text: str, metrics: FontMetrics, size: float, width: float) -> list[tuple[int, int]]:
+    """
+    Where each line of `text` starts when wrapped in a frame `width` points
+    wide, as (token index, character offset within that token).
+    """
+    limit = width / size  # compare widths at 1 pt
+    tokens, prefix = metrics.tokens(text)
+    if prefix[-1] <= limit:
+        return [(0, 0)]
+    n = len(tokens)
+    starts, i = [], 0
+    while i < n:
+        starts.append((i, 0))
+        # Tokens i..j-1 fit on this line; token j also fits if only its
+        # trailing spaces overhang (PowerPoint lets them hang past the edge)
+        j = bisect_right(prefix, prefix[i] + limit, i) - 1
+        if j < n:
+            word = tokens[j].rstrip()
+            if prefix[j] - prefix[i] + metrics.words[word] <= limit:
+                j += 1
+        if j == i:
+            # A word wider than the frame is broken between characters
+            x = 0.0
+            for k, ch in enumerate(tokens[i].rstrip()):
+                cw = metrics.chars[ch]
+                if x > 0.0 and x + cw > limit:
+                    starts.append((i, k))
+                    x = 0.0
+                x += cw
+            j = i + 1
+        i = j
+    return starts or [(0, 0)]
+
+
+def count_lines(text: str, metrics: FontMetrics, size: float, width: float) -> int:
+    """Number of lines `text` wraps to in a frame `width` points wide."""
+    return len(line_starts(text, metrics, size, width))
+
+
+def split_paragraph(text: str, metrics: FontMetrics, size: float, width: float,
+                    max_lines: int) -> list[str]:
+    """Cut a paragraph at line boundaries into pieces of at most max_lines lines."""
+    starts = line_starts(text, metrics, size, width)
+    if len(starts) <= max_lines:
+        return [text]
+    tokens, _ = metrics.tokens(text)
+    offsets = [0, *accumulate(map(len, tokens))]
+    cuts = [offsets[t] + c for t, c in starts[::max_lines]] + [len(text)]
+    return [text[a:b].strip() for a, b in zip(cuts, cuts[1:])]
+
+
+def paragraph_heights(paragraphs: list[str], metrics: FontMetrics, size: float,
+                      width: float, space_after: float = 0.0) -> list[float]:
+    """Height in points of each paragraph, including its space after."""
+    line_h = size * LINE_SPACING
+    return [count_lines(p, metrics, size, width) * line_h + space_after for p in paragraphs]
+
+
+@dataclass
+class FitPage:
+    size: float              # font size in points
+    paragraphs: list[str]
+    height: float            # points needed, including the header paragraph
+
+
+def fit_text(paragraphs: list[str], metrics: FontMetrics, width: float, height: float,
+             size: float, min_size: float, space_after: float = 0.0,
+             header: str | None = None,
+             header_metrics: FontMetrics | None = None) -> list[FitPage]:
+    """
+    Lay paragraphs out in a frame of width x height points.
+
+    If they fit at some size between `size` and `min_size`, one page at the
+    largest such size is returned. Otherwise the paragraphs are split into
+    pages at full `size`; `header` (e.g. a box label) is repeated on each
+    page, measured with `header_metrics` (default: `metrics`). A paragraph
+    taller than the frame is cut at line boundaries into pieces that fit; a
+    page still overflows only if one line is taller than the frame.
+    """
+    header_metrics = header_metrics or metrics
+
+    def needed(s: float) -> float:
+        head = paragraph_heights([header], header_metrics, s, width, space_after)[0] if header is not None else 0.0
+        return head + sum(paragraph_heights(paragraphs, metrics, s, width, space_after))
+
+    # Height only grows with the font size, so search the candidate sizes
+    # (size, size - SHRINK_STEP, ..., >= min_size) for the largest that fits
+    sizes = [size - k * SHRINK_STEP for k in range(int((size - min_size) / SHRINK_STEP) + 1)]
+    lo, hi = (0, 0) if needed(size) <= height else (1, len(sizes))
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if needed(sizes[mid]) <= height:
+            hi = mid
+        else:
+            lo = mid + 1
+    if lo < len(sizes):
+        return [FitPage(sizes[lo], list(paragraphs), needed(sizes[lo]))]
+
+    head = paragraph_heights([header], header_metrics, size, width, space_after)[0] if header is not None else 0.0
+    max_lines = max(1, int((height - head - space_after) / (size * LINE_SPACING)))
+    pieces = [piece for para in paragraphs
+              for piece in split_paragraph(para, metrics, size, width, max_lines)]
+    heights = paragraph_heights(pieces, metrics, size, width, space_after)
+    pages, current, used = [], [], head
+    for para, h in zip(pieces, heights):
+        if current and used + h > height:
+            pages.append(FitPage(size, current, used))
+            current, used = [], head
+        current.append(para)
+        used += h
+    if current or not pages:
+        pages.append(FitPage(size, current, used))
+    return pages
+
+
+# ── Table generation ──────────────────────────────────────────────────────────
+def rebuild_metrics(path: Path = METRICS_FILE):
+    """Regenerate METRICS_FILE from PyMuPDF's built-in base-14 fonts."""
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz
+    import json
+
+    tables = {}
+    for family, styles in _BASE14.items():
+        tables[family] = {}
+        for style, base14 in styles.items():
+            font = fitz.Font(base14)
+            widths = {cp: round(font.glyph_advance(cp) * 1000)
+                      for lo, hi in _MEASURED_RANGES for cp in range(lo, hi)
+                      if font.has_glyph(cp)}
+            values = sorted(widths.values())
+            default = values[len(values) // 2]  # median advance for unknown glyphs
+            runs, start, run = [], None, []
+            for cp in sorted(widths):
+                if start is not None and cp == start + len(run):
+                    run.append(widths[cp])
+                else:
+                    if run:
+                        runs.append([start, run])
+                    start, run = cp, [widths[cp]]
+            runs.append([start, run])
+            tables[family][style] = {"default": default, "runs": runs}
+    # One code point run per line keeps the file small and diffable
+    out = ["{"]
+    for fi, (family, styles) in enumerate(tables.items()):
+        out.append(f"  {json.dumps(family)}: {{")
+        for si, (style, table) in enumerate(styles.items()):
+            out.append(f'    "{style}": {{"default": {table["default"]}, "runs": [')
+            out += [f"      {json.dumps(run, separators=(',', ':'))}," for run in table["runs"]]
+            out[-1] = out[-1].rstrip(",")
+            out.append("    ]}" + ("," if si + 1 < len(styles) else ""))
+        out.append("  }" + ("," if fi + 1 < len(tables) else ""))
+    out.append("}")
+    path.write_text("\n".join(out) + "\n", encoding="utf-8")
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    if "--rebuild-metrics" in sys.argv:
+        rebuild_metrics()
+        sys.exit(0)
+    if len(sys.argv) < 2:
+        print("Usage: python text_fit.py <content.json> [--template math|cs|stats]")
+        print("       python text_fit.py --rebuild-metrics")
+        sys.exit(1)
+
+    import time
+    from build_pptx import layout_deck, TEMPLATES
+    from slide_io import load_deck, validate_slides
+
+    template = "math"
+    if "--template" in sys.argv:
+        template = sys.argv[sys.argv.index("--template") + 1]
+    slides = validate_slides(load_deck(sys.argv[1]))
+    t0 = time.perf_counter()
+    pages = layout_deck(slides, TEMPLATES.get(template, TEMPLATES["stats"]))
+    ms = (time.perf_counter() - t0) * 1000
+    print(f"Measured {len(slides)} slides in {ms:.1f} ms -> {len(pages)} slides")
+    for page in pages:
+        if page["fit_note"]:
+            print(f"  slide {page['source_index'] + 1}: {page['fit_note']}")
@@ -0,0 +1,294 @@
+"""
+CUHKsz Course Helper - Page Thumbnails
+Renders low-resolution thumbnails of every page of a PDF (from
+compile_latex.py or convert_to_pdf.py) and tiles them into contact sheets or
+an HTML gallery, so a rebuilt deck can be reviewed at a glance.
+
+Thumbnails are cached on disk under a hash of what the page draws: its
+content streams, the images and form XObjects it uses, its fonts (by name,
+without the subset tag, since a subset changes whenever any page gains a
+glyph), its size and rotation, and the DPI. An unchanged page of a rebuilt
+deck is therefore a cache hit, and only pages that changed are rendered.
+Misses are rendered with PyMuPDF in a process pool. The cache is trimmed to
+--cache-mb by evicting the least recently used thumbnails.
+
+Usage:
+    python thumbnails.py <file.pdf ...> [--out DIR] [--dpi D] [--grid COLSxROWS]
+                         [--html] [--jobs N] [--cache-mb MB]
+
+Output goes to <name>_thumbs/ next to each PDF unless --out is given:
+contact sheets sheet_01.png, sheet_02.png, ... or, with --html, index.html
+plus one PNG per page.
+"""
+
+import hashlib
+import html
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "cuhksz-course-helper"
+THUMB_CACHE = CACHE_DIR / "thumbnails"
+
+DEFAULT_DPI = 36              # a 13.33" x 7.5" slide becomes 480 x 270 px
+DEFAULT_GRID = (4, 5)         # columns x rows per contact sheet
+DEFAULT_CACHE_MB = 512
+# Below this many pages to render, a process pool costs more than it saves
+POOL_MIN_PAGES = 8
+
+SHEET_GAP = 12                # points between thumbnails on a contact sheet
+SHEET_LABEL_H = 14            # points reserved under each thumbnail for the page number
+
+
+def _fitz():
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz
+    return fitz
+
+
+# ── Page hashing ──────────────────────────────────────────────────────────────
+def page_keys(doc, dpi: int) -> list[str]:
+    """Cache key per page: hash of everything that affects its rendering."""
+    stream_hashes: dict[int, bytes] = {}  # shared images / forms are hashed once
+
+    def stream_hash(xref: int) -> bytes:
+        h = stream_hashes.get(xref)
+        if h is None:
+            try:
+                h = hashlib.sha256(doc.xref_stream_raw(xref) or b"").digest()
+            except Exception:
+                h = b""
+            stream_hashes[xref] = h
+        return h
+
+    keys = []
+    for page in doc:
+        h = hashlib.sha256(f"{dpi}|{tuple(page.rect)}|{page.rotation}".encode())
+        h.update(page.read_contents())
+        for img in doc.get_page_images(page.number, full=True):
+            h.update(stream_hash(img[0]))
+        for xobj in doc.get_page_xobjects(page.number):
+            h.update(stream_hash(xobj[0]))
+        for font in doc.get_page_fonts(page.number, full=True):
+            basefont = font[3].split("+", 1)[-1]
+            h.update(f"|{font[1]}|{basefont}|{font[4]}".encode())
+        keys.append(h.hexdigest())
+    return keys
+
+
+def _cache_path(key: str) -> Path:
+    return THUMB_CACHE / key[:2] / f"{key}.png"
+
+
+# ── Rendering ─────────────────────────────────────────────────────────────────
+def _render_pages(args: tuple) -> int:
+    """Worker: render the given (page number, key) pairs of one PDF into the cache."""
+    pdf_path, jobs, dpi = args
+    fitz = _fitz()
+    with fitz.open(pdf_path) as doc:
+        for pno, key in jobs:
+            dest = _cache_path(key)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(f".{key}.{os.getpid()}.png")
+            doc[pno].get_pixmap(dpi=dpi, annots=False).save(str(tmp))
+            tmp.replace(dest)
+    return len(jobs)
+
+
+def render_thumbnails(pdf_path: str, dpi: int = DEFAULT_DPI, jobs: int | None = None) -> list[Path]:
+    """
+    Make sure every page of pdf_path has a cached thumbnail and return their
+    paths in page order. Only pages missing from the cache are rendered.
+    """
+    fitz = _fitz()
+    with fitz.open(pdf_path) as doc:
+        keys = page_keys(doc, dpi)
+
+    paths = [_cache_path(k) for k in keys]
+    # Identical pages (e.g. repeated outline slides) are rendered once
+    missing, seen = [], set()
+    for pno, (key, path) in enumerate(zip(keys, paths)):
+        if key not in seen and not path.exists():
+            missing.append((pno, key))
+        seen.add(key)
+
+    workers = jobs or os.cpu_count() or 1
+    if len(missing) < POOL_MIN_PAGES or workers == 1:
+        if missing:
+            _render_pages((str(pdf_path), missing, dpi))
+    else:
+        # Contiguous chunks so each worker opens the PDF once
+        size = -(-len(missing) // workers)
+        chunks = [(str(pdf_path), missing[i:i + size], dpi) for i in range(0, len(missing), size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render_pages, chunks))
+
+    for p in set(paths):
+        os.utime(p)  # mark as recently used for LRU eviction
+    print(f"Thumbnails: {Path(pdf_path).name}: {len(keys)} pages, "
+          f"{len(missing)} rendered, {len(keys) - len(missing)} cached")
+    return paths
+
+
+def trim_cache(max_mb: int = DEFAULT_CACHE_MB):
+    """Delete least recently used thumbnails until the cache fits in max_mb."""
+    if not THUMB_CACHE.exists():
+        return
+    files = []
+    for p in THUMB_CACHE.glob("*/*.png"):
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        files.append((st.st_mtime, st.st_size, p))
+    total = sum(size for _, size, _ in files)
+    limit = max_mb * 1024 * 1024
+    for _, size, p in sorted(files):
+        if total <= limit:
+            break
+        p.unlink(missing_ok=True)
+        total -= size
+
+
+# ── Output ────────────────────────────────────────────────────────────────────
+def write_contact_sheets(thumbs: list[Path], out_dir: Path, grid: tuple[int, int] = DEFAULT_GRID,
+                         title: str = "") -> list[Path]:
+    """Tile thumbnails, with page numbers, into sheet_NN.png images."""
+    fitz = _fitz()
+    if not thumbs:
+        return []
+    cols, rows = grid
+    # Thumbnails are placed at their own pixel size (1 pt = 1 px at 72 dpi)
+    first = fitz.Pixmap(str(thumbs[0]))
+    tw, th = first.width, first.height
+    cell_w, cell_h = tw + SHEET_GAP, th + SHEET_LABEL_H + SHEET_GAP
+    per_sheet = cols * rows
+
+    sheets = []
+    for s, start in enumerate(range(0, len(thumbs), per_sheet), start=1):
+        batch = thumbs[start:start + per_sheet]
+        used_rows = -(-len(batch) // cols)
+        doc = fitz.open()
+        page = doc.new_page(width=cols * cell_w + SHEET_GAP,
+                            height=used_rows * cell_h + SHEET_GAP + SHEET_LABEL_H)
+        if title:
+            page.insert_text((SHEET_GAP, SHEET_LABEL_H - 2), title, fontsize=10)
+        for i, thumb in enumerate(batch):
+            x = SHEET_GAP + (i % cols) * cell_w
+            y = SHEET_GAP + SHEET_LABEL_H + (i // cols) * cell_h
+            rect = fitz.Rect(x, y, x + tw, y + th)
+            page.insert_image(rect, filename=str(thumb))
+            page.draw_rect(rect, color=(0.6, 0.6, 0.6), width=0.5)
+            page.insert_text((x, y + th + SHEET_LABEL_H - 3), str(start + i + 1), fontsize=9)
+        dest = out_dir / f"sheet_{s:02d}.png"
+        page.get_pixmap(dpi=72).save(str(dest))
+        doc.close()
+        sheets.append(dest)
+    return sheets
+
+
+def write_gallery(thumbs: list[Path], out_dir: Path, title: str = "") -> Path:
+    """Copy the thumbnails into out_dir and write an index.html grid of them."""
+    figures = []
+    for i, thumb in enumerate(thumbs, start=1):
+        name = f"page_{i:03d}.png"
+        shutil.copyfile(thumb, out_dir / name)
+        figures.append(f'<figure><img src="{name}" loading="lazy" alt="Page {i}">'
+                       f"<figcaption>{i}</figcaption></figure>")
+    page = (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title>\n<style>"
+        "body{font-family:sans-serif;margin:16px}"
+        ".grid{display:grid;grid-template-columns:repeat(auto-fill,minmax(240px,1fr));gap:12px}"
+        "figure{margin:0}img{width:100%;border:1px solid #999}"
+        "figcaption{font-size:12px;color:#555}"
+        "</style></head><body>\n"
+        f"<h1>{html.escape(title)}</h1>\n<div class=\"grid\">\n"
+        + "\n".join(figures)
+        + "\n</div></body></html>\n"
+    )
+    dest = out_dir / "index.html"
+    dest.write_text(page, encoding="utf-8")
+    return dest
+
+
+def make_thumbnails(pdf_path: str, out_dir: str = None, dpi: int = DEFAULT_DPI,
+                    grid: tuple[int, int] = DEFAULT_GRID, gallery: bool = False,
+                    jobs: int | None = None, cache_mb: int = DEFAULT_CACHE_MB) -> list[Path] | None:
+    """Thumbnails of pdf_path as contact sheets (or an HTML gallery). Returns the written files."""
+    try:
+        _fitz()
+    except ImportError:
+        print("ERROR: PyMuPDF not installed. Run: pip install pymupdf")
+        return None
+    pdf = Path(pdf_path).resolve()
+    if not pdf.exists():
+        print(f"ERROR: File not found: {pdf}")
+        return None
+
+    try:
+        thumbs = render_thumbnails(str(pdf), dpi, jobs)
+    except Exception as e:
+        print(f"ERROR: could not render {pdf.name}: {e}")
+        return None
+
+    out = Path(out_dir) if out_dir else pdf.with_name(f"{pdf.stem}_thumbs")
+    out.mkdir(parents=True, exist_ok=True)
+    for old in list(out.glob("sheet_*.png")) + list(out.glob("page_*.png")):
+        old.unlink()  # a shorter deck must not leave stale pages behind
+    if not gallery:
+        (out / "index.html").unlink(missing_ok=True)  # would link the deleted pages
+    if gallery:
+        written = [write_gallery(thumbs, out, pdf.name)]
+    else:
+        written = write_contact_sheets(thumbs, out, grid, pdf.name)
+    trim_cache(cache_mb)
+    print(f"Done: {out} ({len(written)} file{'s' if len(written) != 1 else ''})")
+    return written
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python thumbnails.py <file.pdf ...> [--out DIR] [--dpi D] "
+              "[--grid COLSxROWS] [--html] [--jobs N] [--cache-mb MB]")
+        sys.exit(1)
+
+    args = sys.argv[1:]
+    files, out_arg, d, g, as_html, n_jobs, c_mb = [], None, DEFAULT_DPI, DEFAULT_GRID, False, None, DEFAULT_CACHE_MB
+    i = 0
+    while i < len(args):
+        if args[i] == "--out" and i + 1 < len(args):
+            out_arg = args[i + 1]
+            i += 2
+        elif args[i] == "--dpi" and i + 1 < len(args):
+            d = int(args[i + 1])
+            i += 2
+        elif args[i] == "--grid" and i + 1 < len(args):
+            c, r = args[i + 1].lower().split("x")
+            g = (int(c), int(r))
+            i += 2
+        elif args[i] == "--html":
+            as_html = True
+            i += 1
+        elif args[i] == "--jobs" and i + 1 < len(args):
+            n_jobs = int(args[i + 1])
+            i += 2
+        elif args[i] == "--cache-mb" and i + 1 < len(args):
+            c_mb = int(args[i + 1])
+            i += 2
+        else:
+            files.append(args[i])
+            i += 1
+
+    results = []
+    for f in files:
+        # With several PDFs, --out is a parent folder holding one subfolder each
+        target = (str(Path(out_arg) / f"{Path(f).stem}_thumbs") if out_arg and len(files) > 1
+                  else out_arg)
+        results.append(make_thumbnails(f, target, d, g, as_html, n_jobs, c_mb))
+    sys.exit(0 if results and all(results) else 1)
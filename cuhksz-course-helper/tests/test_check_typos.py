@@ -0,0 +1,45 @@
+"""
+Suspected-typo detection against the bundled dictionaries.
+
+    python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from check_typos import BUNDLED_VOCAB, TypoIndex, _read_vocab  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def index() -> TypoIndex:
+    words = []
+    for path in BUNDLED_VOCAB:
+        words.extend(_read_vocab(path))
+    return TypoIndex.build(words)
+
+
+@pytest.mark.parametrize("word", [
+    "occured", "estimater", "variancely", "matrixes", "functionment", "hypothesises", "datas",
+])
+def test_misspellings_are_not_known(index, word):
+    assert not index.is_known(word)
+
+
+@pytest.mark.parametrize("word", [
+    "bank", "company", "weather", "coin", "dice", "Motivating",
+    "eigenvectors", "autoencoders", "student's", "students'",
+])
+def test_words_and_plurals_are_known(index, word):
+    assert index.is_known(word)
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("occured", "occurred"), ("matrixes", "matrices"), ("probablity", "probability"),
+    ("recieve", "receive"), ("seperate", "separate"),
+])
+def test_suggestions(index, word, expected):
+    assert expected in index.suggest(word)
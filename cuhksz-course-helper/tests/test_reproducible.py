@@ -0,0 +1,88 @@
+"""
+Byte-reproducible output: building the same input twice, at different
+wall-clock times, must give identical files.
+
+    python -m pytest tests
+"""
+
+import hashlib
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+# Zip entry times have 2-second resolution; wait long enough for a clock-based
+# timestamp to differ between the two builds
+CLOCK_GAP_S = 2.1
+
+DECK = {
+    "slides": [
+        {"index": 1, "type": "title", "title": "Lecture 1: Probability",
+         "body_text": ["STA2001", "Fall term"]},
+        {"index": 2, "type": "definition", "title": "Sample space",
+         "body_text": ["The set of all outcomes of an experiment.", "Example: a coin toss."]},
+        {"index": 3, "type": "content", "title": "Dice",
+         "body_text": ["Two fair dice are rolled. " * 20]},
+    ]
+}
+
+TEX = r"""\documentclass{beamer}
+\begin{document}
+\begin{frame}{Sample space}
+The set of all outcomes of an experiment.
+\end{frame}
+\begin{frame}{Dice}
+Two fair dice are rolled.
+\end{frame}
+\end{document}
+"""
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_build_pptx_is_reproducible(tmp_path, monkeypatch):
+    pytest.importorskip("pptx")
+    from build_pptx import build_pptx
+
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    first, second = tmp_path / "first.pptx", tmp_path / "second.pptx"
+    assert build_pptx(DECK, str(first), template_name="stats")
+    time.sleep(CLOCK_GAP_S)
+    assert build_pptx(DECK, str(second), template_name="stats")
+    assert _sha256(first) == _sha256(second)
+
+
+def test_build_pptx_honours_source_date_epoch(tmp_path, monkeypatch):
+    pytest.importorskip("pptx")
+    from build_pptx import build_pptx
+
+    default, dated = tmp_path / "default.pptx", tmp_path / "dated.pptx"
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    assert build_pptx(DECK, str(default), template_name="stats")
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    assert build_pptx(DECK, str(dated), template_name="stats")
+    assert _sha256(default) != _sha256(dated)
+
+
+@pytest.mark.skipif(shutil.which("pdflatex") is None, reason="pdflatex not installed")
+def test_compile_tex_is_reproducible(tmp_path, monkeypatch):
+    from compile_latex import compile_tex
+
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    tex = tmp_path / "deck.tex"
+    tex.write_text(TEX, encoding="utf-8")
+    digests = []
+    for run in ("first", "second"):
+        out = tmp_path / run
+        out.mkdir()
+        pdf = compile_tex(str(tex), str(out))
+        assert pdf
+        digests.append(_sha256(Path(pdf)))
+        time.sleep(CLOCK_GAP_S)
+    assert digests[0] == digests[1]